@@ -1,18 +1,416 @@
 # app.py
 import sqlite3
 import datetime
-from models import User, ExpenseGroup, Expense, ExpenseShare
+from models import User, ExpenseGroup, Expense, ExpenseShare, allocate_cents
 import database as db
 import traceback
-
-db.initialize_db()
+import threading
+import heapq
+import math
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
 
 # Constants
 DB_PATH = 'expenses.db'
+DB_PROFILE = 'balanced'  # one of db.PROFILES, or None for SQLite defaults
+POOL_SIZE = 4  # idle connections kept per thread
+CACHE_SIZE = 1024  # entries kept by the user/group lookup cache
+BALANCE_CACHE_SIZE = 64  # group balance matrices kept by the result cache
+
+db.initialize_db(DB_PATH, profile=DB_PROFILE)
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool.
+
+    `with conn:` blocks nest. Only a block that starts the transaction commits
+    or rolls it back; a block entered while a transaction is already open
+    becomes a savepoint. That lets the db.* functions, which each use
+    `with conn:`, join the caller's transaction instead of committing it.
+    """
+    pool = None
+    borrowed = False
+    pinned = False  # held by a session(); close() leaves it borrowed
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._savepoints = []  # one entry per open `with` block; None = owns the transaction
+
+    def _begin(self, immediate=False):
+        if self.in_transaction:
+            name = f"sp{len(self._savepoints)}"
+            self.execute(f"SAVEPOINT {name}")
+        else:
+            name = None
+            self.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        self._savepoints.append(name)
+
+    def _end(self, ok):
+        name = self._savepoints.pop()
+        if not self.in_transaction:
+            return  # SQLite already rolled the whole transaction back
+        if name is None:
+            if ok:
+                try:
+                    self.commit()
+                except sqlite3.Error:
+                    self.rollback()
+                    raise
+            else:
+                self.rollback()
+        elif ok:
+            self.execute(f"RELEASE {name}")
+        else:
+            self.execute(f"ROLLBACK TO {name}")
+            self.execute(f"RELEASE {name}")
+
+    def __enter__(self):
+        self._begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._end(exc_type is None)
+        return False
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Like `with conn:`, but immediate=True takes the write lock up front"""
+        self._begin(immediate)
+        try:
+            yield self
+        except BaseException:
+            self._end(False)
+            raise
+        self._end(True)
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        elif self.pinned:
+            pass  # a session owns it and will close it when the session ends
+        elif self.borrowed:
+            self.pool.release(self)
+        # otherwise it is already idle in the pool; a second close() is a no-op
+
+    def really_close(self):
+        self.pool = None
+        super().close()
+
+class ConnectionPool:
+    """Per-thread pool of long-lived SQLite connections.
+
+    sqlite3 connections may only be used from the thread that opened them, so
+    every thread keeps its own stack of idle connections. Borrowed connections
+    are health-checked with a trivial query before being handed out; broken
+    ones are discarded and replaced.
+    """
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0, "closed": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _idle(self, key):
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = self._local.idle = {}
+        return idle.setdefault(key, [])
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self, db_path, profile=None):
+        """Borrow a connection to db_path, reusing an idle one when possible"""
+        key = (db_path, profile)
+        idle = self._idle(key)
+        while idle:
+            conn = idle.pop()
+            if self._is_healthy(conn):
+                conn.borrowed = True
+                self._count("reused")
+                return conn
+            self._discard(conn)
+
+        conn = db.connect_db(db_path, factory=PooledConnection, profile=profile)
+        conn.pool_key = key
+        conn.pool = self
+        conn.borrowed = True
+        self._count("opened")
+        return conn
+
+    def release(self, conn):
+        """Return a borrowed connection; rolls back anything left uncommitted"""
+        conn.borrowed = False
+        conn._savepoints.clear()
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        idle = self._idle(conn.pool_key)
+        if len(idle) < self.size:
+            idle.append(conn)
+        else:
+            conn.really_close()
+            self._count("closed")
+
+    def _discard(self, conn):
+        try:
+            conn.really_close()
+        except sqlite3.Error:
+            pass
+        self._count("discarded")
+
+    def close_all(self):
+        """Close the idle connections owned by the calling thread"""
+        idle = getattr(self._local, "idle", {})
+        for conns in idle.values():
+            while conns:
+                conns.pop().really_close()
+                self._count("closed")
+
+_pool = ConnectionPool()
+_session_local = threading.local()
 
 def get_db_connection():
-    """Get a connection to the database"""
-    return db.connect_db(DB_PATH)
+    """Borrow a connection to the database; close() returns it to the pool.
+
+    Inside session() this is the session's connection, and close() leaves it open.
+    """
+    conn = getattr(_session_local, "conn", None)
+    if conn is not None:
+        return conn
+    return _pool.acquire(DB_PATH, DB_PROFILE)
+
+def _in_session():
+    return getattr(_session_local, "conn", None) is not None
+
+@contextmanager
+def session():
+    """Unit of work: run any number of app.* and db.* calls in one transaction.
+
+    Every app function called on this thread inside the block uses the
+    session's connection, so all of their writes are committed together when
+    the block exits (one commit, one fsync) and rolled back together if it
+    raises. The connection is yielded for direct db.* calls. App functions
+    still report their own failures by return value and roll back only their
+    own work; raise to abandon the whole session. Nested sessions become
+    savepoints.
+
+        with app.session() as conn:
+            group_id = app.create_group("Trip", created_by=alice)
+            app.add_member(group_id, bob)
+            db.insert_expense(conn, Expense(...))
+    """
+    conn = getattr(_session_local, "conn", None)
+    owner = conn is None
+    if owner:
+        conn = _pool.acquire(DB_PATH, DB_PROFILE)
+        conn.pinned = True
+        _session_local.conn = conn
+    # each nesting level buffers its own events, so a rolled-back savepoint drops them
+    parent_events = getattr(_session_local, "events", None)
+    _session_local.events = []
+    try:
+        with conn:
+            yield conn
+    except BaseException:
+        _cache.clear()  # lookups inside the session may have cached rolled-back rows
+        raise
+    finally:
+        events, _session_local.events = _session_local.events, parent_events
+        if owner:
+            _session_local.conn = None
+            conn.pinned = False
+            conn.close()
+    if owner:
+        for event in events:  # only once everything is committed
+            _events.publish(event)
+    else:
+        parent_events.extend(events)
+
+def get_pool_stats():
+    """Return a copy of the connection pool counters (opened vs reused etc.)"""
+    with _pool._lock:
+        return dict(_pool.stats)
+
+def get_db_settings():
+    """Report the effective PRAGMA values of the configured connection"""
+    conn = get_db_connection()
+    try:
+        return db.get_pragma_settings(conn)
+    except Exception as e:
+        print(f"Error reading database settings: {e}")
+        return {}
+    finally:
+        conn.close()
+
+def set_pool_size(size):
+    """Change how many idle connections each thread keeps"""
+    if size < 0:
+        raise ValueError("pool size must be non-negative.")
+    _pool.size = size
+
+def close_pool():
+    """Close the calling thread's idle pooled connections"""
+    _pool.close_all()
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss counters"""
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drop every entry for which predicate(key, value) is true"""
+        with self._lock:
+            for key in [k for k, v in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._data), "maxsize": self.maxsize}
+
+# Identity map for users, groups and member lists. Keys are ("user", id),
+# ("username", name), ("group", id) and ("members", group_id). Misses and
+# errors are never cached; write wrappers below invalidate what they touch.
+_cache = LRUCache()
+
+def get_cache_stats():
+    """Return hit/miss counters and size of the lookup cache"""
+    return _cache.stats()
+
+def clear_cache():
+    """Drop every cached user, group and member list"""
+    _cache.clear()
+
+def _invalidate_user(user_id):
+    """Forget a user everywhere it may be cached, including member lists"""
+    def touches_user(key, value):
+        kind = key[0]
+        if kind == "user":
+            return key[1] == user_id
+        if kind == "username":
+            return value.id == user_id
+        if kind == "members":
+            return any(member.id == user_id for member in value)
+        return False
+    _cache.invalidate_where(touches_user)
+
+def _invalidate_group(group_id):
+    _cache.invalidate(("group", group_id), ("members", group_id))
+
+# Change Notification
+# Write wrappers publish a ChangeEvent once their write has committed, so
+# views can reload only what changed. Inside session() events are held back
+# and published when the session commits; a rolled-back session publishes
+# nothing. Handlers run on the thread that made the write.
+USER_CREATED = "user_created"
+USER_UPDATED = "user_updated"
+USER_DELETED = "user_deleted"
+GROUP_CREATED = "group_created"
+GROUP_UPDATED = "group_updated"
+GROUP_DELETED = "group_deleted"
+MEMBERSHIP_CHANGED = "membership_changed"
+EXPENSE_CREATED = "expense_created"
+EXPENSE_UPDATED = "expense_updated"  # amounts, payer or shares; the expense keeps its place
+EXPENSE_DELETED = "expense_deleted"
+SETTLEMENT_RECORDED = "settlement_recorded"  # payments and paid flags of unspecified expenses
+
+class ChangeEvent:
+    """What a committed write touched. group_id None means any group may be affected."""
+    __slots__ = ('kind', 'group_id', 'user_id', 'expense_ids')
+
+    def __init__(self, kind, group_id=None, user_id=None, expense_ids=()):
+        self.kind = kind
+        self.group_id = group_id
+        self.user_id = user_id
+        self.expense_ids = tuple(expense_ids)
+
+    def __repr__(self):
+        return (f"ChangeEvent({self.kind!r}, group_id={self.group_id}, user_id={self.user_id}, "
+                f"expense_ids={self.expense_ids})")
+
+class EventBus:
+    """Thread-safe synchronous publish/subscribe for ChangeEvents"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = []
+
+    def subscribe(self, handler, kinds=None):
+        with self._lock:
+            self._handlers.append((handler, frozenset(kinds) if kinds is not None else None))
+
+    def unsubscribe(self, handler):
+        with self._lock:
+            self._handlers = [(h, k) for h, k in self._handlers if h is not handler]
+
+    def publish(self, event):
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler, kinds in handlers:
+            if kinds is not None and event.kind not in kinds:
+                continue
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"Error in change handler for {event.kind}: {e}")
+
+_events = EventBus()
+
+def subscribe(handler, kinds=None):
+    """Call handler(event) after every committed write, or only for the given event kinds"""
+    _events.subscribe(handler, kinds)
+
+def unsubscribe(handler):
+    _events.unsubscribe(handler)
+
+def _publish(kind, group_id=None, user_id=None, expense_ids=()):
+    event = ChangeEvent(kind, group_id=group_id, user_id=user_id, expense_ids=expense_ids)
+    pending = getattr(_session_local, "events", None)
+    if pending is not None:
+        pending.append(event)
+    else:
+        _events.publish(event)
 
 # User Management Functions
 def create_user(username, first_name=None, last_name=None, email=None):
@@ -26,6 +424,7 @@ def create_user(username, first_name=None, last_name=None, email=None):
         user = User(username=username, first_name=first_name, 
                    last_name=last_name, email=email)
         user_id = db.insert_user(conn, user)
+        _publish(USER_CREATED, user_id=user_id)
         return user_id
     except sqlite3.IntegrityError:
         print(f"Username '{username}' already exists")
@@ -41,9 +440,14 @@ def get_user(user_id):
     Returns:
         A User object if found, None otherwise
     """
+    user = _cache.get(("user", user_id))
+    if user is not None:
+        return user
     conn = get_db_connection()
     try:
         user = db.get_user_by_id(conn, user_id)
+        if user is not None:
+            _cache.put(("user", user_id), user)
         return user
     except Exception as e:
         print(f"Error retrieving user: {e}")
@@ -74,6 +478,8 @@ def update_user(user_id, username=None, first_name=None, last_name=None, email=N
             existing_user.email = email
 
         db.update_user(conn, existing_user)
+        _invalidate_user(user_id)
+        _publish(USER_UPDATED, user_id=user_id)
         return True
     
     except Exception as e:
@@ -96,6 +502,8 @@ def delete_user(user_id):
             return False
         
         db.delete_user(conn, user_id)
+        _invalidate_user(user_id)
+        _publish(USER_DELETED, user_id=user_id)
         return True
     except Exception as e:
         print(f"Error deleting user: {e}")
@@ -133,8 +541,11 @@ def create_group(name, description=None, created_by=None):
             raise ValueError("created_by (user ID) is required to create a group.")
 
         group = ExpenseGroup(name=name, description=description, created_by=created_by)
-        group_id = db.insert_expense_group(conn, group)
-        db.add_group_member(conn, group_id, created_by)
+        with conn:
+            group_id = db.insert_expense_group(conn, group)
+            db.add_group_member(conn, group_id, created_by)
+        _invalidate_group(group_id)
+        _publish(GROUP_CREATED, group_id=group_id, user_id=created_by)
         return group_id
     except Exception as e:
         print(f"Error creating group: {e}")
@@ -156,6 +567,8 @@ def add_member(group_id, user_id):
             return False
 
         db.add_group_member(conn, group_id, user_id)
+        _cache.invalidate(("members", group_id))
+        _publish(MEMBERSHIP_CHANGED, group_id=group_id, user_id=user_id)
         return True
     except Exception as e:
         print(f"Error adding user to group: {e}")
@@ -177,6 +590,8 @@ def remove_member(group_id, user_id):
             return False
 
         db.remove_group_member(conn, group_id, user_id)
+        _cache.invalidate(("members", group_id))
+        _publish(MEMBERSHIP_CHANGED, group_id=group_id, user_id=user_id)
         return True
     except Exception as e:
         print(f"Error removing user from group: {e}")
@@ -184,11 +599,61 @@ def remove_member(group_id, user_id):
     finally:
         conn.close()
 
+def add_members_bulk(group_id, user_ids):
+    """Add many users to an expense group in one transaction
+
+    Returns:
+        The list of user IDs actually added (existing members are skipped),
+        or None if the change failed
+    """
+    conn = get_db_connection()
+    try:
+        added = db.add_group_members_bulk(conn, group_id, user_ids)
+        _cache.invalidate(("members", group_id))
+        if added:
+            _publish(MEMBERSHIP_CHANGED, group_id=group_id)
+        return added
+    except sqlite3.IntegrityError:
+        print(f"Unknown user or group in bulk add to group {group_id}")
+        return None
+    except Exception as e:
+        print(f"Error adding users to group: {e}")
+        return None
+    finally:
+        conn.close()
+
+def set_group_members(group_id, user_ids):
+    """Make a group's membership exactly user_ids in one transaction
+
+    Returns:
+        {"added": [...], "removed": [...]} user IDs, or None if the change failed
+    """
+    conn = get_db_connection()
+    try:
+        changes = db.set_group_members(conn, group_id, user_ids)
+        _cache.invalidate(("members", group_id))
+        if changes["added"] or changes["removed"]:
+            _publish(MEMBERSHIP_CHANGED, group_id=group_id)
+        return changes
+    except sqlite3.IntegrityError:
+        print(f"Unknown user or group in membership of group {group_id}")
+        return None
+    except Exception as e:
+        print(f"Error setting group members: {e}")
+        return None
+    finally:
+        conn.close()
+
 def get_group_members(group_id):
     """Fetch all users who are members of a specific group"""
+    members = _cache.get(("members", group_id))
+    if members is not None:
+        return list(members)
     conn = get_db_connection()
     try:
-        return db.get_group_members(conn, group_id)
+        members = db.get_group_members(conn, group_id)
+        _cache.put(("members", group_id), members)
+        return list(members)
     except Exception as e:
         print(f"Error retrieving group members: {e}")
         return []
@@ -206,6 +671,17 @@ def get_all_groups():
     finally:
         conn.close()
 
+def get_all_groups_with_creators():
+    """Fetch all groups with creator username, member count and total spend"""
+    conn = get_db_connection()
+    try:
+        return db.get_all_groups_with_creators(conn)
+    except Exception as e:
+        print(f"Error retrieving groups: {e}")
+        return []
+    finally:
+        conn.close()
+
 def delete_group(group_id):
     """Delete a group by group ID
     Returns:
@@ -219,6 +695,8 @@ def delete_group(group_id):
             return False
         
         db.delete_expense_group(conn, group_id)
+        _invalidate_group(group_id)
+        _publish(GROUP_DELETED, group_id=group_id)
         return True
     except Exception as e:
         print(f"Error deleting group: {e}")
@@ -233,9 +711,14 @@ def get_expense_group(group_id):
     Returns:
         An ExpenseGroup object if found, None otherwise 
     """
+    group = _cache.get(("group", group_id))
+    if group is not None:
+        return group
     conn = get_db_connection()
     try:
         group = db.get_expense_group(conn, group_id)
+        if group is not None:
+            _cache.put(("group", group_id), group)
         return group
     except Exception as e:
         print(f"Error retrieving group: {e}")
@@ -283,6 +766,7 @@ def delete_expense(expense_id):
             return False
         
         db.delete_expense(conn, expense_id)
+        _publish(EXPENSE_DELETED, group_id=existing_expense.group_id, expense_ids=[expense_id])
         return True
     except Exception as e:
         print(f"Error deleting expense: {e}")
@@ -290,18 +774,46 @@ def delete_expense(expense_id):
     finally:
         conn.close()
 
+def split_shares(amount, shares_dict):
+    """Turn a shares_dict into exact per-user amounts in cents.
+
+    If values sum to 0 → even split among the listed members; if 100 →
+    percentages; otherwise they're treated as absolute amounts in cents and
+    must sum to `amount` exactly. Even and percentage splits use the
+    largest-remainder method, so the result always sums to `amount`.
+
+    Returns:
+        dict[int, int]: {user_id: cents}.
+    """
+    if any(value < 0 for value in shares_dict.values()):
+        raise ValueError("Share values must be non-negative.")
+
+    total_input = sum(shares_dict.values())
+    if total_input == 0:                             # even split among *listed* users
+        weights = [1] * len(shares_dict)
+    elif math.isclose(total_input, 100):             # percentages
+        weights = list(shares_dict.values())
+    else:                                            # custom absolute amounts
+        if any(not isinstance(value, int) for value in shares_dict.values()):
+            raise ValueError("Absolute shares must be integer cents.")
+        if total_input != amount:
+            raise ValueError("Shares must sum to total amount.")
+        return dict(shares_dict)
+
+    return dict(zip(shares_dict, allocate_cents(amount, weights)))
+
 def create_expense_with_shares(description, amount, paid_by, group_id, shares_dict):
     """Create a new expense with shares.
 
     Args:
         description (str): Text description.
-        amount (float): Total amount (> 0).
+        amount (int): Total amount in cents (> 0).
         paid_by (int): user_id of the payer (must be in the group).
         group_id (int): ID of the expense group.
-        shares_dict (dict[int, float]): {user_id: share}; may include
+        shares_dict (dict[int, int | float]): {user_id: share}; may include
             *any subset* of group members. If values sum to 0 → even split
             among the listed members; if 100 → percentages; otherwise they’re
-            treated as absolute amounts and must sum to `amount`.
+            treated as absolute amounts in cents and must sum to `amount`.
 
     Returns:
         int | None: Newly-created expense ID, or None on failure.
@@ -310,6 +822,8 @@ def create_expense_with_shares(description, amount, paid_by, group_id, shares_di
         raise ValueError("group_id is required.")
     if not shares_dict:
         raise ValueError("shares_dict cannot be empty.")
+    if not isinstance(amount, int):
+        raise ValueError("amount must be integer cents.")
     if amount <= 0:
         raise ValueError("amount must be positive.")
 
@@ -327,56 +841,108 @@ def create_expense_with_shares(description, amount, paid_by, group_id, shares_di
                 raise ValueError(f"user_id {uid} is not a member of this group.")
 
         # ----- prepare shares -------------------------------------------------
-        total_input = sum(shares_dict.values())
-
-        if total_input == 100:                       # percentages
-            for uid in shares_dict:
-                shares_dict[uid] = amount * shares_dict[uid] / 100
-
-        elif total_input == 0:                       # even split among *listed* users
-            even = amount / len(shares_dict)
-            for uid in shares_dict:
-                shares_dict[uid] = even
-
-        # otherwise: custom absolute amounts -------------------------------
-        actual_sum = sum(shares_dict.values())
-        if abs(actual_sum - amount) > 1e-3:
-            raise ValueError("Shares must sum to total amount.")
+        shares_dict = split_shares(amount, shares_dict)
 
-        # -------------------------------------------------------------------
-        conn.execute("BEGIN")                        # atomic block
-
-        expense = Expense(
-            description=description,
-            amount=amount,
-            paid_by=paid_by,
-            group_id=group_id,
-        )
-        expense_id = db.insert_expense(conn, expense)
-
-        for uid, share in shares_dict.items():
-            if share < 0:
-                raise ValueError("Share values must be non-negative.")
-            is_paid = (uid == paid_by)
-            expense_share = ExpenseShare(
-                expense_id=expense_id,
-                user_id=uid,
-                amount=share,
-                is_paid=is_paid,
+        # ----- one transaction, one commit -----------------------------------
+        with conn:
+            expense = Expense(
+                description=description,
+                amount=amount,
+                paid_by=paid_by,
+                group_id=group_id,
             )
-            db.insert_expense_share(conn, expense_share)
+            expense_id = db.insert_expense(conn, expense)
 
-        conn.commit()
+            for uid, share in shares_dict.items():
+                is_paid = (uid == paid_by)
+                expense_share = ExpenseShare(
+                    expense_id=expense_id,
+                    user_id=uid,
+                    amount=share,
+                    is_paid=is_paid,
+                )
+                db.insert_expense_share(conn, expense_share)
+
+        _publish(EXPENSE_CREATED, group_id=group_id, expense_ids=[expense_id])
         return expense_id
 
     except Exception as e:
-        conn.rollback()
         print("Error creating shares:", e)
         return None
 
     finally:
         conn.close()
 
+def create_expenses_with_shares_bulk(entries):
+    """Create many expenses with shares in one transaction.
+
+    Each entry is a dict of create_expense_with_shares keyword arguments
+    (description, amount, paid_by, group_id, shares_dict) plus an optional
+    "date". Membership is looked up once per group, and all expenses and then
+    all shares are written with one executemany each. Nothing is written if
+    any entry is invalid.
+
+    Returns:
+        list[int] | None: New expense IDs in entry order, or None on failure.
+    """
+    conn = get_db_connection()
+    try:
+        members = {}  # group_id -> set of member ids
+        expenses, splits = [], []
+        for entry in entries:
+            group_id = entry.get("group_id")
+            amount = entry.get("amount")
+            paid_by = entry.get("paid_by")
+            shares_dict = entry.get("shares_dict")
+            if group_id is None:
+                raise ValueError("group_id is required.")
+            if not shares_dict:
+                raise ValueError("shares_dict cannot be empty.")
+            if not isinstance(amount, int):
+                raise ValueError("amount must be integer cents.")
+            if amount <= 0:
+                raise ValueError("amount must be positive.")
+
+            if group_id not in members:
+                members[group_id] = {u.id for u in db.get_group_members(conn, group_id)}
+            valid_user_ids = members[group_id]
+            if paid_by not in valid_user_ids:
+                raise ValueError(f"paid_by user {paid_by} is not a member of group {group_id}.")
+            for uid in shares_dict:
+                if uid not in valid_user_ids:
+                    raise ValueError(f"user_id {uid} is not a member of group {group_id}.")
+
+            expenses.append(Expense(
+                description=entry.get("description"),
+                amount=amount,
+                date=entry.get("date"),
+                paid_by=paid_by,
+                group_id=group_id,
+            ))
+            splits.append(split_shares(amount, shares_dict))
+
+        with conn:
+            expense_ids = db.insert_expenses_bulk(conn, expenses)
+            db.insert_expense_shares_bulk(conn, (
+                ExpenseShare(expense_id=expense_id, user_id=uid, amount=share,
+                             is_paid=(uid == expense.paid_by))
+                for expense_id, expense, split in zip(expense_ids, expenses, splits)
+                for uid, share in split.items()
+            ))
+        by_group = {}
+        for expense_id, expense in zip(expense_ids, expenses):
+            by_group.setdefault(expense.group_id, []).append(expense_id)
+        for group_id, ids in by_group.items():
+            _publish(EXPENSE_CREATED, group_id=group_id, expense_ids=ids)
+        return expense_ids
+
+    except Exception as e:
+        print("Error creating expenses:", e)
+        return None
+
+    finally:
+        conn.close()
+
 def get_group_expenses(group_id):
     """Fetch all expenses for a specific group"""
     conn = get_db_connection()
@@ -388,42 +954,257 @@ def get_group_expenses(group_id):
         return None
     finally:
         conn.close()
-        
-# Balance and Settlement Functions
-def get_user_balances(group_id, user_id):
-    """Get the balance of a user in a group."""
+
+
+def get_group_expenses_page(group_id, after_id=None, limit=100, date_from=None, date_to=None, paid_by=None):
+    """Fetch one page of a group's expenses, newest first (keyset pagination)"""
     conn = get_db_connection()
     try:
-        return db.get_user_balances(conn, group_id, user_id)
-    
+        return db.get_group_expenses_page(conn, group_id, after_id=after_id, limit=limit,
+                                          date_from=date_from, date_to=date_to, paid_by=paid_by)
     except Exception as e:
-        print(f"Error retrieving user's balance: {e}")
+        print(f"Error retrieving expenses page: {e}")
         return None
+    finally:
+        conn.close()
+
+def iter_group_expense_pages(group_id, page_size=500, date_from=None, date_to=None, paid_by=None):
+    """Walk all of a group's expenses page by page, newest first.
+
+    Yields lists of at most `page_size` Expense objects; only one page is held
+    in memory at a time and no connection is kept between pages.
+    """
+    after_id = None
+    while True:
+        page = get_group_expenses_page(group_id, after_id=after_id, limit=page_size,
+                                       date_from=date_from, date_to=date_to, paid_by=paid_by)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after_id = page[-1].id
 
+def get_group_expense_summaries(group_id):
+    """Fetch a group's expenses with payer username and the total of shares not marked paid in one query"""
+    conn = get_db_connection()
+    try:
+        return db.get_group_expense_summaries(conn, group_id)
+    except Exception as e:
+        print(f"Error retrieving expense summaries: {e}")
+        return []
     finally:
         conn.close()
 
-def get_user_debts(group_id, user_id):
-    """Get debts of a user in a group."""
+def get_group_expense_summaries_window(group_id, offset=0, limit=100):
+    """Fetch the expense summaries at positions [offset, offset + limit), newest first"""
     conn = get_db_connection()
     try:
-        return db.get_user_owes_whom(conn, group_id, user_id)
-    
+        return db.get_group_expense_summaries_window(conn, group_id, offset=offset, limit=limit)
+    except Exception as e:
+        print(f"Error retrieving expense summaries: {e}")
+        return []
+    finally:
+        conn.close()
+
+def get_expense_summaries(expense_ids):
+    """Fetch the summaries of specific expenses, e.g. the rows a write just changed"""
+    conn = get_db_connection()
+    try:
+        return db.get_expense_summaries(conn, expense_ids)
     except Exception as e:
-        print(f"Error retrieving user's debts: {e}")
+        print(f"Error retrieving expense summaries: {e}")
+        return []
+    finally:
+        conn.close()
+
+def count_group_expenses(group_id):
+    """Return how many expenses a group has, or None on error"""
+    conn = get_db_connection()
+    try:
+        return db.count_group_expenses(conn, group_id)
+    except Exception as e:
+        print(f"Error counting expenses: {e}")
         return None
-    
     finally:
         conn.close()
 
-def get_user_is_owed_by(group_id, user_id):
-    """Return list of members owing the user inside the group."""
+# Balance and Settlement Functions
+# Balance matrices are memoized per group and validated with PRAGMA
+# data_version read on a dedicated watcher connection. That connection never
+# writes, so its data_version moves whenever any other connection commits,
+# whether from this process's pool or another process.
+_balance_cache = LRUCache(maxsize=BALANCE_CACHE_SIZE)
+_watcher_lock = threading.Lock()
+_watcher = {"path": None, "conn": None}
+
+def _data_version():
+    """Return the database's current PRAGMA data_version as seen by the watcher"""
+    with _watcher_lock:
+        if _watcher["path"] != DB_PATH:
+            if _watcher["conn"] is not None:
+                _watcher["conn"].close()
+            _watcher["conn"] = sqlite3.connect(DB_PATH, check_same_thread=False)
+            _watcher["path"] = DB_PATH
+            _balance_cache.clear()
+        return _watcher["conn"].execute("PRAGMA data_version").fetchone()[0]
+
+def get_balance_cache_stats():
+    """Return hit/miss counters and size of the balance result cache"""
+    return _balance_cache.stats()
+
+def get_group_balance_matrix(group_id):
+    """Compute every member's totals and pairwise debts in a group in one pass.
+
+    Pass the result as `matrix=` to the per-user balance functions below to
+    answer any number of per-user views without touching the database again.
+    Results are cached until the database changes; treat them as read-only.
+    """
+    if _in_session():
+        version = None  # the session may hold uncommitted writes the watcher cannot see
+    else:
+        try:
+            version = _data_version()  # read before computing, so a racing write only forces a recompute
+        except Exception as e:
+            print(f"Error reading database version: {e}")
+            version = None
+
+    # entries for older versions are never hit again and age out of the LRU
+    key = (group_id, version)
+    if version is not None:
+        matrix = _balance_cache.get(key)
+        if matrix is not None:
+            return matrix
+
     conn = get_db_connection()
     try:
-        return db.get_user_is_owed_by(conn, group_id, user_id)
+        matrix = db.get_group_balance_matrix(conn, group_id)
+        if version is not None:
+            _balance_cache.put(key, matrix)
+        return matrix
     except Exception as e:
-        print(f"Error retrieving who owes the user: {e}")
+        print(f"Error retrieving group balances: {e}")
+        return None
+    finally:
+        conn.close()
+
+def get_user_balances(group_id, user_id, matrix=None):
+    """Get the balance of a user in a group."""
+    if matrix is None:
+        matrix = get_group_balance_matrix(group_id)
+    if matrix is None:
+        return None
+    return db.user_balances_from_matrix(matrix, user_id)
+
+def get_user_debts(group_id, user_id, matrix=None):
+    """Get debts of a user in a group."""
+    if matrix is None:
+        matrix = get_group_balance_matrix(group_id)
+    if matrix is None:
+        return None
+    return db.user_owes_whom_from_matrix(matrix, user_id)
+
+def get_user_is_owed_by(group_id, user_id, matrix=None):
+    """Return list of members owing the user inside the group."""
+    if matrix is None:
+        matrix = get_group_balance_matrix(group_id)
+    if matrix is None:
         return []
+    return db.user_is_owed_by_from_matrix(matrix, user_id)
+
+def net_balances_from_matrix(matrix):
+    """Net unpaid position of every user: positive is owed, negative owes."""
+    net = {uid: 0 for uid in matrix["users"]}
+    for debtor, row in matrix["debts"].items():
+        for creditor, amount in row.items():
+            if debtor == creditor:
+                continue
+            net[debtor] = net.get(debtor, 0) - amount
+            net[creditor] = net.get(creditor, 0) + amount
+    return net
+
+def plan_settlements(net_balances):
+    """Reduce net balances to a minimal-ish list of transfers.
+
+    Greedy min-cash-flow: repeatedly pay the largest creditor from the largest
+    debtor using two heaps, so it runs in O(n log n) and emits at most n - 1
+    transfers.
+
+    Args:
+        net_balances (dict[int, int]): {user_id: net cents}; must sum to 0.
+
+    Returns:
+        list[tuple[int, int, int]]: (debtor_id, creditor_id, cents).
+    """
+    creditors, debtors = [], []
+    for uid, amount in net_balances.items():
+        if amount > 0:
+            heapq.heappush(creditors, (-amount, uid))
+        elif amount < 0:
+            heapq.heappush(debtors, (amount, uid))
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+
+        credit_left = -credit - amount
+        debt_left = -debt - amount
+        if credit_left > 0:
+            heapq.heappush(creditors, (-credit_left, creditor))
+        if debt_left > 0:
+            heapq.heappush(debtors, (-debt_left, debtor))
+    return transfers
+
+CLOSE_BOOKS_NOTE = 'books closed'  # ledger note of plan_group_settlement(close_books=True)
+
+def plan_group_settlement(group_id, close_books=False):
+    """Plan the transfers that clear every unpaid debt in a group.
+
+    The plan is a suggestion: nothing is recorded for it, since the ledger
+    tracks payments per debtor/creditor pair and the planned transfers route
+    money between other pairs. Record the transfers people actually make with
+    record_payment().
+
+    With close_books=True the group's books are closed in the same transaction
+    that computed the plan: every pair's outstanding debt is written off in the
+    settlements ledger under the note CLOSE_BOOKS_NOTE and every unpaid share
+    is marked paid. Those ledger rows are a bookkeeping close, not payments.
+
+    close_books replaces the original apply=True, which marked every unpaid
+    share paid. Once balances came from the settlements ledger, that flag no
+    longer settled anything, and the planned transfers themselves cannot be
+    recorded pair by pair. The atomic option therefore closes the books
+    instead of applying the plan.
+
+    Returns:
+        list[dict] | None: [{"from", "from_username", "to", "to_username",
+        "amount"}], or None on failure.
+    """
+    conn = get_db_connection()
+    try:
+        # hold the write lock while planning so the plan matches the books that get closed
+        with conn.transaction(immediate=True) if close_books else nullcontext():
+            matrix = db.get_group_balance_matrix(conn, group_id)
+            transfers = plan_settlements(net_balances_from_matrix(matrix))
+            if close_books:
+                db.settle_group(conn, group_id, note=CLOSE_BOOKS_NOTE)
+        if close_books:
+            _publish(SETTLEMENT_RECORDED, group_id=group_id)
+
+        users = matrix["users"]
+        return [{
+            "from":          debtor,
+            "from_username": users.get(debtor, {}).get("username"),
+            "to":            creditor,
+            "to_username":   users.get(creditor, {}).get("username"),
+            "amount":        amount,
+        } for debtor, creditor, amount in transfers]
+    except Exception as e:
+        print(f"Error planning group settlement: {e}")
+        return None
     finally:
         conn.close()
 
@@ -431,7 +1212,9 @@ def settle_user_pair(group_id, debtor_id, creditor_id):
     """Settle debts between two users in a group."""
     conn = get_db_connection()
     try:
-        shares_paid = db.settle_user_pair(conn, group_id, debtor_id, creditor_id)
+        with conn.transaction(immediate=True):
+            shares_paid = db.settle_user_pair(conn, group_id, debtor_id, creditor_id)
+        _publish(SETTLEMENT_RECORDED, group_id=group_id)
         return shares_paid
     except Exception as e:
         print(f"Error settling debts between users: {e}")
@@ -439,11 +1222,100 @@ def settle_user_pair(group_id, debtor_id, creditor_id):
     finally:
         conn.close()
 
+def settle_group(group_id, until=None):
+    """Pay off everything owed in a group and mark its shares paid, in one transaction.
+
+    With `until` (a date) only the unpaid shares of expenses dated on or
+    before it are settled, e.g. for month-end closing.
+
+    Returns:
+        {"shares": n, "pairs": {(debtor_id, creditor_id): shares},
+        "paid": {(debtor_id, creditor_id): cents}}, or None on failure.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.transaction(immediate=True):
+            result = db.settle_group(conn, group_id, until=until)
+        _publish(SETTLEMENT_RECORDED, group_id=group_id)
+        return result
+    except Exception as e:
+        print(f"Error settling group: {e}")
+        return None
+    finally:
+        conn.close()
+
+def settle_user_all(user_id, group_id=None, until=None):
+    """Pay off everything a user owes or is owed, in one transaction.
+
+    Limited to one group when group_id is given, and to expenses dated on or
+    before `until` when that is given.
+
+    Returns:
+        The same dict as settle_group, or None on failure.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.transaction(immediate=True):
+            result = db.settle_user_all(conn, user_id, group_id=group_id, until=until)
+        _publish(SETTLEMENT_RECORDED, group_id=group_id, user_id=user_id)
+        return result
+    except Exception as e:
+        print(f"Error settling user's debts: {e}")
+        return None
+    finally:
+        conn.close()
+
+def record_payment(group_id, from_user_id, to_user_id, amount, note=None):
+    """Record a (possibly partial) payment between two group members.
+
+    Args:
+        amount (int): Cents paid by from_user_id to to_user_id (> 0).
+
+    Returns:
+        int | None: The ledger entry ID, or None on failure.
+    """
+    if not isinstance(amount, int) or amount <= 0:
+        raise ValueError("amount must be positive integer cents.")
+    if from_user_id == to_user_id:
+        raise ValueError("a payment needs two different users.")
+
+    conn = get_db_connection()
+    try:
+        member_ids = {u.id for u in db.get_group_members(conn, group_id)}
+        for uid in (from_user_id, to_user_id):
+            if uid not in member_ids:
+                raise ValueError(f"user_id {uid} is not a member of this group.")
+        entry_id = db.record_settlements(conn, group_id, [(from_user_id, to_user_id, amount)], note=note)[0]
+        _publish(SETTLEMENT_RECORDED, group_id=group_id)
+        return entry_id
+    except Exception as e:
+        print(f"Error recording payment: {e}")
+        return None
+    finally:
+        conn.close()
+
+def get_group_settlements(group_id, before_id=None, limit=100):
+    """Fetch one page of a group's payment ledger, newest first"""
+    conn = get_db_connection()
+    try:
+        return db.get_group_settlements(conn, group_id, before_id=before_id, limit=limit)
+    except Exception as e:
+        print(f"Error retrieving settlements: {e}")
+        return []
+    finally:
+        conn.close()
+
 def get_user_by_username(username):
     """Fetch a user by username (wrapper over DB layer)."""
+    user = _cache.get(("username", username))
+    if user is not None:
+        return user
     conn = get_db_connection()
     try:
-        return db.get_user_by_username(conn, username)
+        user = db.get_user_by_username(conn, username)
+        if user is not None:
+            _cache.put(("username", username), user)
+        return user
     except Exception as e:
         print(f"Error retrieving user by username: {e}")
         return None
@@ -475,7 +1347,11 @@ def update_expense_group(group_id, name=None, description=None):
             group.name = name
         if description is not None:
             group.description = description
-        return db.update_expense_group(conn, group)
+        updated = db.update_expense_group(conn, group)
+        _cache.invalidate(("group", group_id))
+        if updated:
+            _publish(GROUP_UPDATED, group_id=group_id)
+        return updated
     except Exception as e:
         print(f"Error updating group: {e}")
         return False
@@ -484,7 +1360,7 @@ def update_expense_group(group_id, name=None, description=None):
 
 
 def update_expense(expense_id, description=None, amount=None, date=None, paid_by=None):
-    """Update an expense (wrapper over DB layer). Does not recalc shares."""
+    """Update an expense (wrapper over DB layer). Does not recalc shares; amount is in cents."""
     conn = get_db_connection()
     try:
         expense = db.get_expense(conn, expense_id)
@@ -499,7 +1375,10 @@ def update_expense(expense_id, description=None, amount=None, date=None, paid_by
             expense.date = date
         if paid_by is not None:
             expense.paid_by = paid_by
-        return db.update_expense(conn, expense)
+        updated = db.update_expense(conn, expense)
+        if updated:
+            _publish(EXPENSE_UPDATED, group_id=expense.group_id, expense_ids=[expense_id])
+        return updated
     except Exception as e:
         print(f"Error updating expense: {e}")
         return False
@@ -507,14 +1386,87 @@ def update_expense(expense_id, description=None, amount=None, date=None, paid_by
         conn.close()
 
 
+def update_expense_with_shares(expense_id, shares_dict, description=None, amount=None, date=None, paid_by=None):
+    """Update an expense and replace its whole share set in one transaction.
+
+    shares_dict is interpreted as in create_expense_with_shares against the
+    new amount. Shares are diffed against the stored ones and only changed rows
+    are written. The payer's share is marked paid; other shares keep their paid
+    flag while their amount and the payer are unchanged, since the settlements
+    ledger still holds that payment, and are unpaid otherwise.
+
+    Returns:
+        True if the expense was updated, False otherwise
+    """
+    conn = get_db_connection()
+    try:
+        expense = db.get_expense(conn, expense_id)
+        if not expense:
+            print(f"Expense with ID {expense_id} not found")
+            return False
+        old_paid_by = expense.paid_by
+        if description is not None:
+            expense.description = description
+        if amount is not None:
+            expense.amount = amount
+        if date is not None:
+            expense.date = date
+        if paid_by is not None:
+            expense.paid_by = paid_by
+
+        if not shares_dict:
+            raise ValueError("shares_dict cannot be empty.")
+        if not isinstance(expense.amount, int) or expense.amount <= 0:
+            raise ValueError("amount must be positive integer cents.")
+        valid_user_ids = {u.id for u in db.get_group_members(conn, expense.group_id)}
+        if expense.paid_by not in valid_user_ids:
+            raise ValueError("paid_by user is not a member of this group.")
+        for uid in shares_dict:
+            if uid not in valid_user_ids:
+                raise ValueError(f"user_id {uid} is not a member of this group.")
+        split = split_shares(expense.amount, shares_dict)
+
+        with conn:
+            current = {s.user_id: s for s in db.get_expense_shares(conn, expense_id)}
+
+            def is_paid(uid, share):
+                if uid == expense.paid_by:
+                    return True
+                old = current.get(uid)
+                return (old is not None and old.is_paid and old.amount == share
+                        and expense.paid_by == old_paid_by)
+
+            db.update_expense(conn, expense)
+            db.replace_expense_shares(conn, expense_id, {
+                uid: (share, is_paid(uid, share)) for uid, share in split.items()
+            })
+        _publish(EXPENSE_UPDATED, group_id=expense.group_id, expense_ids=[expense_id])
+        return True
+    except Exception as e:
+        print(f"Error updating expense: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def _publish_share_change(conn, share_id):
+    """Publish EXPENSE_UPDATED for the expense a share belongs to"""
+    expense = db.get_share_expense(conn, share_id)
+    if expense is not None:
+        _publish(EXPENSE_UPDATED, group_id=expense.group_id, expense_ids=[expense.id])
+
 def update_expense_share(share_id, amount, is_paid):
-    """Update an expense share (wrapper over DB layer)."""
+    """Update an expense share (wrapper over DB layer). amount is in cents;
+    changing is_paid records or reverses the payment as mark_share_as_paid does."""
     conn = get_db_connection()
     try:
         if amount is None or is_paid is None:
             raise ValueError("amount and is_paid are required to update a share")
         share = ExpenseShare(id=share_id, amount=amount, is_paid=is_paid)
-        return db.update_expense_share(conn, share)
+        updated = db.update_expense_share(conn, share)
+        if updated:
+            _publish_share_change(conn, share_id)
+        return updated
     except Exception as e:
         print(f"Error updating expense share: {e}")
         return False
@@ -526,7 +1478,10 @@ def delete_expense_share(share_id):
     """Delete an expense share by ID (wrapper over DB layer)."""
     conn = get_db_connection()
     try:
+        expense = db.get_share_expense(conn, share_id)
         db.delete_expense_share(conn, share_id)
+        if expense is not None:
+            _publish(EXPENSE_UPDATED, group_id=expense.group_id, expense_ids=[expense.id])
         return True
     except Exception as e:
         print(f"Error deleting expense share: {e}")
@@ -539,7 +1494,10 @@ def mark_share_as_paid(share_id, is_paid=True):
     """Mark/unmark an expense share as paid (wrapper over DB layer)."""
     conn = get_db_connection()
     try:
-        return db.mark_share_as_paid(conn, share_id, is_paid)
+        updated = db.mark_share_as_paid(conn, share_id, is_paid)
+        if updated:
+            _publish_share_change(conn, share_id)
+        return updated
     except Exception as e:
         print(f"Error marking share as paid: {e}")
         return False
@@ -548,13 +1506,53 @@ def mark_share_as_paid(share_id, is_paid=True):
 
 # === Added by Codex: insert_expense_share wrapper ===
 def insert_expense_share(expense_id, user_id, amount, is_paid=False):
-    """Create an expense share (wrapper over DB layer)."""
+    """Create an expense share (wrapper over DB layer). amount is in cents;
+    is_paid=True records the payment as mark_share_as_paid does."""
     conn = get_db_connection()
     try:
         share = ExpenseShare(expense_id=expense_id, user_id=user_id, amount=amount, is_paid=is_paid)
-        return db.insert_expense_share(conn, share)
+        share_id = db.insert_expense_share(conn, share)
+        _publish_share_change(conn, share_id)
+        return share_id
     except Exception as e:
         print(f"Error inserting expense share: {e}")
         return None
     finally:
         conn.close()
+
+# Streaming Functions
+# Generators over the db.iter_* functions. Each one holds a pooled connection
+# for as long as it is being iterated and hands it back when it is exhausted,
+# closed, or garbage-collected. fields/raw limit which columns are fetched or
+# converted (see db.model_columns). Unlike the other wrappers they raise on
+# errors, so a stream that fails partway is never mistaken for a complete one.
+def _stream(db_iter, *args, **options):
+    conn = get_db_connection()
+    try:
+        yield from db_iter(conn, *args, **options)
+    finally:
+        conn.close()
+
+def iter_all_users(batch_size=db.DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream every user without loading them all at once"""
+    return _stream(db.iter_all_users, batch_size=batch_size, fields=fields, raw=raw)
+
+def iter_all_groups(batch_size=db.DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream every expense group without loading them all at once"""
+    return _stream(db.iter_all_expense_groups, batch_size=batch_size, fields=fields, raw=raw)
+
+def iter_user_groups(user_id, batch_size=db.DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the groups a user belongs to"""
+    return _stream(db.iter_user_groups, user_id, batch_size=batch_size, fields=fields, raw=raw)
+
+def iter_group_members(group_id, batch_size=db.DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the members of a group"""
+    return _stream(db.iter_group_members, group_id, batch_size=batch_size, fields=fields, raw=raw)
+
+def iter_group_expenses(group_id, batch_size=db.DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the expenses of a group, newest first"""
+    return _stream(db.iter_group_expenses, group_id, batch_size=batch_size, fields=fields, raw=raw)
+
+def iter_expense_shares(expense_id, batch_size=db.DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the shares of an expense"""
+    return _stream(db.iter_expense_shares, expense_id, batch_size=batch_size, fields=fields, raw=raw)
@@ -1,28 +1,96 @@
 # database.py
 import sqlite3
 import datetime
-from models import User, ExpenseGroup, Expense, ExpenseShare
+from models import User, ExpenseGroup, Expense, ExpenseShare, allocate_cents
 
 __all__ = [
-    "connect_db", "create_tables", "initialize_db",
+    "connect_db", "apply_profile", "get_pragma_settings", "create_tables",
+    "model_columns", "model_row_factory", "migrate_db", "get_schema_version", "initialize_db",
     "insert_user", "get_user_by_id", "get_user_by_username", "get_all_users",
     "update_user", "delete_user",
-    "insert_expense_group", "get_expense_group", "get_user_groups", "update_expense_group", "delete_expense_group",
+    "insert_expense_group", "get_expense_group", "get_all_expense_groups", "get_all_groups_with_creators",
+    "get_user_groups", "update_expense_group", "delete_expense_group",
     "add_group_member", "remove_group_member", "get_group_members",
-    "insert_expense", "get_expense", "get_group_expenses", "update_expense", "delete_expense",
-    "insert_expense_share", "get_expense_shares", "mark_share_as_paid",
-    "get_user_balances", "get_user_owes_whom"
+    "add_group_members_bulk", "set_group_members",
+    "insert_expense", "get_expense", "get_group_expenses", "get_group_expenses_page", "get_group_expense_summaries",
+    "get_group_expense_summaries_window", "get_expense_summaries", "count_group_expenses", "update_expense", "delete_expense",
+    "insert_expenses_bulk", "insert_expense_shares_bulk",
+    "insert_expense_share", "get_expense_shares", "get_share_expense", "mark_share_as_paid", "replace_expense_shares",
+    "get_user_balances", "get_user_owes_whom", "get_user_is_owed_by", "settle_user_pair",
+    "get_group_balance_matrix", "user_balances_from_matrix", "user_owes_whom_from_matrix",
+    "user_is_owed_by_from_matrix", "settle_group_shares", "settle_group", "settle_user_all",
+    "get_settled_totals", "get_outstanding_debts", "record_settlements", "checkpoint_settlements",
+    "get_group_settlements",
+    "rebuild_group_balances", "verify_group_balances",
+    "iter_all_users", "iter_all_expense_groups", "iter_user_groups", "iter_group_members",
+    "iter_group_expenses", "iter_expense_shares"
 ]
 
 
+# Connection performance profiles, applied by connect_db(profile=...)
+# synchronous: 0=OFF, 1=NORMAL, 2=FULL; temp_store: 0=DEFAULT, 1=FILE, 2=MEMORY
+# cache_size is negative KiB; mmap_size is bytes; busy_timeout is milliseconds
+PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": 2,
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "temp_store": 0,
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": 1,
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": 2,
+        "busy_timeout": 5000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": 0,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": 2,
+        "busy_timeout": 10000,
+    },
+}
+
+REPORTED_PRAGMAS = ["journal_mode", "synchronous", "mmap_size", "cache_size",
+                    "temp_store", "busy_timeout", "foreign_keys"]
+
 # Database connection and initialization
-def connect_db(db_path='expenses.db'):
-    """Create a connection to the SQLite database"""
-    conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+def connect_db(db_path='expenses.db', factory=sqlite3.Connection, profile=None):
+    """Create a connection to the SQLite database
+
+    profile names an entry of PROFILES; None leaves SQLite's defaults alone.
+    """
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'")
+    conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES, factory=factory)
     conn.row_factory = sqlite3.Row  # This allows accessing columns by name
     conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key constraints
+    if profile is not None:
+        apply_profile(conn, profile)
     return conn
 
+def apply_profile(conn, profile):
+    """Set the PRAGMAs of a named profile on an open connection"""
+    settings = PROFILES[profile]
+    # busy_timeout goes first so that switching journal_mode already waits on other connections' locks
+    for name in sorted(settings, key=lambda name: name != "busy_timeout"):
+        # PRAGMA does not accept bound parameters; values come from PROFILES only
+        conn.execute(f"PRAGMA {name} = {settings[name]}")
+
+def get_pragma_settings(conn):
+    """Return the effective values of the PRAGMAs the profiles control"""
+    settings = {}
+    for name in REPORTED_PRAGMAS:
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+        settings[name] = row[0] if row else None
+    return settings
+
 def create_tables(conn):
     """Create all necessary tables if they don't exist"""
     cursor = conn.cursor()
@@ -58,7 +126,7 @@ def create_tables(conn):
     CREATE TABLE IF NOT EXISTS expenses (
         id INTEGER PRIMARY KEY,
         description TEXT NOT NULL,
-        amount REAL NOT NULL,
+        amount INTEGER NOT NULL,
         date DATE NOT NULL,
         paid_by INTEGER NOT NULL,
         group_id INTEGER NOT NULL,
@@ -88,7 +156,7 @@ def create_tables(conn):
         id INTEGER PRIMARY KEY,
         expense_id INTEGER NOT NULL,
         user_id INTEGER NOT NULL,
-        amount REAL NOT NULL,
+        amount INTEGER NOT NULL,
         is_paid BOOLEAN DEFAULT 0,
         created_at TIMESTAMP,
         updated_at TIMESTAMP,
@@ -99,6 +167,546 @@ def create_tables(conn):
     
     conn.commit()
 
+# Schema migrations
+# Triggers that keep group_balances in step with expenses and expense_shares.
+# Shared by migration 2, which introduces them, and migration 3, which has to
+# drop and recreate them around its table rebuilds.
+BALANCE_TRIGGER_NAMES = [
+    "trg_shares_insert_balances", "trg_shares_delete_balances", "trg_shares_update_balances",
+    "trg_expenses_update_balances", "trg_expenses_delete_balances", "trg_groups_delete_balances",
+]
+
+BALANCE_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS trg_shares_insert_balances
+    AFTER INSERT ON expense_shares
+    BEGIN
+        INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+        SELECT e.group_id, NEW.user_id, e.paid_by, NEW.amount
+        FROM expenses e
+        WHERE e.id = NEW.expense_id AND NEW.is_paid = 0
+        ON CONFLICT (group_id, debtor_id, creditor_id) DO UPDATE SET amount = amount + excluded.amount;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_shares_delete_balances
+    AFTER DELETE ON expense_shares
+    BEGIN
+        -- when the whole expense is deleted it is already gone here and
+        -- trg_expenses_delete_balances has done the bookkeeping
+        UPDATE group_balances SET amount = amount - OLD.amount
+        WHERE OLD.is_paid = 0
+          AND debtor_id = OLD.user_id
+          AND (group_id, creditor_id) = (SELECT group_id, paid_by FROM expenses WHERE id = OLD.expense_id);
+        DELETE FROM group_balances
+        WHERE group_id = (SELECT group_id FROM expenses WHERE id = OLD.expense_id)
+          AND debtor_id = OLD.user_id AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_shares_update_balances
+    AFTER UPDATE OF expense_id, user_id, amount, is_paid ON expense_shares
+    BEGIN
+        UPDATE group_balances SET amount = amount - OLD.amount
+        WHERE OLD.is_paid = 0
+          AND debtor_id = OLD.user_id
+          AND (group_id, creditor_id) = (SELECT group_id, paid_by FROM expenses WHERE id = OLD.expense_id);
+        INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+        SELECT e.group_id, NEW.user_id, e.paid_by, NEW.amount
+        FROM expenses e
+        WHERE e.id = NEW.expense_id AND NEW.is_paid = 0
+        ON CONFLICT (group_id, debtor_id, creditor_id) DO UPDATE SET amount = amount + excluded.amount;
+        DELETE FROM group_balances
+        WHERE group_id = (SELECT group_id FROM expenses WHERE id = OLD.expense_id)
+          AND debtor_id = OLD.user_id AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_update_balances
+    AFTER UPDATE OF paid_by, group_id ON expenses
+    WHEN OLD.paid_by IS NOT NEW.paid_by OR OLD.group_id IS NOT NEW.group_id
+    BEGIN
+        UPDATE group_balances
+        SET amount = amount - (SELECT SUM(es.amount) FROM expense_shares es
+                               WHERE es.expense_id = OLD.id AND es.is_paid = 0
+                                 AND es.user_id = group_balances.debtor_id)
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by
+          AND debtor_id IN (SELECT user_id FROM expense_shares
+                            WHERE expense_id = OLD.id AND is_paid = 0);
+        INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+        SELECT NEW.group_id, es.user_id, NEW.paid_by, SUM(es.amount)
+        FROM expense_shares es
+        WHERE es.expense_id = NEW.id AND es.is_paid = 0
+        GROUP BY es.user_id
+        ON CONFLICT (group_id, debtor_id, creditor_id) DO UPDATE SET amount = amount + excluded.amount;
+        DELETE FROM group_balances
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_delete_balances
+    BEFORE DELETE ON expenses
+    BEGIN
+        UPDATE group_balances
+        SET amount = amount - (SELECT SUM(es.amount) FROM expense_shares es
+                               WHERE es.expense_id = OLD.id AND es.is_paid = 0
+                                 AND es.user_id = group_balances.debtor_id)
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by
+          AND debtor_id IN (SELECT user_id FROM expense_shares
+                            WHERE expense_id = OLD.id AND is_paid = 0);
+        DELETE FROM group_balances
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_groups_delete_balances
+    AFTER DELETE ON expense_groups
+    BEGIN
+        DELETE FROM group_balances WHERE group_id = OLD.id;
+    END''',
+]
+
+def _reallocate_rounded_shares(conn):
+    """
+    Migration 3 helper: where rounding each share to cents broke an expense
+    whose shares used to add up to its total, redistribute the expense total
+    over its shares with the largest-remainder method instead.
+    """
+    broken = conn.execute('''
+    SELECT e.id, e.amount
+    FROM expenses_new e
+    JOIN expense_shares_new es ON es.expense_id = e.id
+    GROUP BY e.id
+    HAVING SUM(es.amount) != e.amount
+    ''').fetchall()
+
+    updates = []
+    for expense_id, total_cents in broken:
+        old_shares = conn.execute(
+            'SELECT id, amount FROM expense_shares WHERE expense_id = ? ORDER BY id', (expense_id,)
+        ).fetchall()
+        old_total = sum(amount for _, amount in old_shares)
+        if abs(old_total * 100 - total_cents) >= 1 or old_total <= 0:
+            continue  # shares never matched the total; keep the plain rounding
+        cents = allocate_cents(total_cents, [amount for _, amount in old_shares])
+        updates.extend((c, share_id) for (share_id, _), c in zip(old_shares, cents))
+    conn.executemany('UPDATE expense_shares_new SET amount = ? WHERE id = ?', updates)
+
+# Recomputes group_balances from expense_shares; the table must be empty
+POPULATE_BALANCES_SQL = '''
+INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+SELECT e.group_id, es.user_id, e.paid_by, SUM(es.amount)
+FROM expense_shares es
+JOIN expenses e ON es.expense_id = e.id
+WHERE es.is_paid = 0
+GROUP BY e.group_id, es.user_id, e.paid_by
+'''
+
+# Settlement ledger (migration 5). From here on group_balances holds *gross*
+# debts: every share a member owes another member, paid or not. Payments are
+# rows of the append-only settlements ledger, and an outstanding balance is
+# gross debt minus what was settled for the pair. is_paid is kept only as a
+# marker of which shares a settlement covered. The triggers above are left as
+# shipped for migrations 2 and 3; these replace them.
+GROSS_BALANCE_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS trg_shares_insert_balances
+    AFTER INSERT ON expense_shares
+    BEGIN
+        INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+        SELECT e.group_id, NEW.user_id, e.paid_by, NEW.amount
+        FROM expenses e
+        WHERE e.id = NEW.expense_id AND NEW.user_id != e.paid_by
+        ON CONFLICT (group_id, debtor_id, creditor_id) DO UPDATE SET amount = amount + excluded.amount;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_shares_delete_balances
+    AFTER DELETE ON expense_shares
+    BEGIN
+        -- when the whole expense is deleted it is already gone here and
+        -- trg_expenses_delete_balances has done the bookkeeping
+        UPDATE group_balances SET amount = amount - OLD.amount
+        WHERE debtor_id = OLD.user_id
+          AND (group_id, creditor_id) = (SELECT group_id, paid_by FROM expenses
+                                         WHERE id = OLD.expense_id AND paid_by != OLD.user_id);
+        DELETE FROM group_balances
+        WHERE group_id = (SELECT group_id FROM expenses WHERE id = OLD.expense_id)
+          AND debtor_id = OLD.user_id AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_shares_update_balances
+    AFTER UPDATE OF expense_id, user_id, amount ON expense_shares
+    BEGIN
+        UPDATE group_balances SET amount = amount - OLD.amount
+        WHERE debtor_id = OLD.user_id
+          AND (group_id, creditor_id) = (SELECT group_id, paid_by FROM expenses
+                                         WHERE id = OLD.expense_id AND paid_by != OLD.user_id);
+        INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+        SELECT e.group_id, NEW.user_id, e.paid_by, NEW.amount
+        FROM expenses e
+        WHERE e.id = NEW.expense_id AND NEW.user_id != e.paid_by
+        ON CONFLICT (group_id, debtor_id, creditor_id) DO UPDATE SET amount = amount + excluded.amount;
+        DELETE FROM group_balances
+        WHERE group_id = (SELECT group_id FROM expenses WHERE id = OLD.expense_id)
+          AND debtor_id = OLD.user_id AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_update_balances
+    AFTER UPDATE OF paid_by, group_id ON expenses
+    WHEN OLD.paid_by IS NOT NEW.paid_by OR OLD.group_id IS NOT NEW.group_id
+    BEGIN
+        UPDATE group_balances
+        SET amount = amount - (SELECT SUM(es.amount) FROM expense_shares es
+                               WHERE es.expense_id = OLD.id
+                                 AND es.user_id = group_balances.debtor_id)
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by
+          AND debtor_id IN (SELECT user_id FROM expense_shares
+                            WHERE expense_id = OLD.id AND user_id != OLD.paid_by);
+        INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+        SELECT NEW.group_id, es.user_id, NEW.paid_by, SUM(es.amount)
+        FROM expense_shares es
+        WHERE es.expense_id = NEW.id AND es.user_id != NEW.paid_by
+        GROUP BY es.user_id
+        ON CONFLICT (group_id, debtor_id, creditor_id) DO UPDATE SET amount = amount + excluded.amount;
+        DELETE FROM group_balances
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_delete_balances
+    BEFORE DELETE ON expenses
+    BEGIN
+        UPDATE group_balances
+        SET amount = amount - (SELECT SUM(es.amount) FROM expense_shares es
+                               WHERE es.expense_id = OLD.id
+                                 AND es.user_id = group_balances.debtor_id)
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by
+          AND debtor_id IN (SELECT user_id FROM expense_shares
+                            WHERE expense_id = OLD.id AND user_id != OLD.paid_by);
+        DELETE FROM group_balances
+        WHERE group_id = OLD.group_id AND creditor_id = OLD.paid_by AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_groups_delete_balances
+    AFTER DELETE ON expense_groups
+    BEGIN
+        DELETE FROM group_balances WHERE group_id = OLD.id;
+    END''',
+]
+
+# Ledger rows may only be removed together with their group (by the cascade,
+# which runs after the group row is gone)
+LEDGER_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS trg_settlements_no_update
+    BEFORE UPDATE ON settlements
+    BEGIN
+        SELECT RAISE(ABORT, 'settlements are append-only');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_settlements_no_delete
+    BEFORE DELETE ON settlements
+    WHEN EXISTS (SELECT 1 FROM expense_groups WHERE id = OLD.group_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'settlements are append-only');
+    END''',
+]
+
+# Recomputes gross group_balances from expense_shares; the table must be empty
+POPULATE_GROSS_BALANCES_SQL = '''
+INSERT INTO group_balances (group_id, debtor_id, creditor_id, amount)
+SELECT e.group_id, es.user_id, e.paid_by, SUM(es.amount)
+FROM expense_shares es
+JOIN expenses e ON es.expense_id = e.id
+WHERE es.user_id != e.paid_by
+GROUP BY e.group_id, es.user_id, e.paid_by
+HAVING SUM(es.amount) != 0
+'''
+
+# Per-payer paid totals (migration 6), so the balance matrix reads one row per
+# payer instead of summing every expense of the group
+PAID_TOTAL_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_insert_paid_totals
+    AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO group_paid_totals (group_id, user_id, amount)
+        VALUES (NEW.group_id, NEW.paid_by, NEW.amount)
+        ON CONFLICT (group_id, user_id) DO UPDATE SET amount = amount + excluded.amount;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_update_paid_totals
+    AFTER UPDATE OF amount, paid_by, group_id ON expenses
+    BEGIN
+        UPDATE group_paid_totals SET amount = amount - OLD.amount
+        WHERE group_id = OLD.group_id AND user_id = OLD.paid_by;
+        INSERT INTO group_paid_totals (group_id, user_id, amount)
+        VALUES (NEW.group_id, NEW.paid_by, NEW.amount)
+        ON CONFLICT (group_id, user_id) DO UPDATE SET amount = amount + excluded.amount;
+        DELETE FROM group_paid_totals
+        WHERE group_id = OLD.group_id AND user_id = OLD.paid_by AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_expenses_delete_paid_totals
+    AFTER DELETE ON expenses
+    BEGIN
+        UPDATE group_paid_totals SET amount = amount - OLD.amount
+        WHERE group_id = OLD.group_id AND user_id = OLD.paid_by;
+        DELETE FROM group_paid_totals
+        WHERE group_id = OLD.group_id AND user_id = OLD.paid_by AND amount = 0;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_groups_delete_paid_totals
+    AFTER DELETE ON expense_groups
+    BEGIN
+        DELETE FROM group_paid_totals WHERE group_id = OLD.id;
+    END''',
+]
+
+# Recomputes group_paid_totals from expenses; the table must be empty
+POPULATE_PAID_TOTALS_SQL = '''
+INSERT INTO group_paid_totals (group_id, user_id, amount)
+SELECT group_id, paid_by, SUM(amount)
+FROM expenses
+GROUP BY group_id, paid_by
+HAVING SUM(amount) != 0
+'''
+
+# Every share already marked paid becomes one ledger payment per group and pair
+MIGRATE_PAID_SHARES_SQL = '''
+INSERT INTO settlements (group_id, from_user_id, to_user_id, amount, note, created_at)
+SELECT e.group_id, es.user_id, e.paid_by, SUM(es.amount), 'migrated from paid shares',
+       COALESCE(MAX(es.updated_at), MAX(es.created_at))
+FROM expense_shares es
+JOIN expenses e ON es.expense_id = e.id
+WHERE es.is_paid = 1 AND es.user_id != e.paid_by
+GROUP BY e.group_id, es.user_id, e.paid_by
+ORDER BY e.group_id, es.user_id, e.paid_by
+'''
+
+def _checkpoint_all_groups(conn):
+    """Migration 5 helper: start every group's ledger from a checkpoint"""
+    group_ids = [row[0] for row in conn.execute('SELECT DISTINCT group_id FROM settlements')]
+    for group_id in group_ids:
+        # not checkpoint_settlements(): its `with conn:` would commit the migration halfway
+        _write_checkpoint(conn, group_id)
+
+# Each entry is (version, [steps]), where a step is an SQL string or a
+# callable taking the connection. Versions must be strictly increasing;
+# append new migrations to the end and never edit one that has shipped.
+MIGRATIONS = [
+    (1, [
+        'CREATE INDEX IF NOT EXISTS idx_expenses_group_paid_by ON expenses (group_id, paid_by)',
+        'CREATE INDEX IF NOT EXISTS idx_expense_shares_expense ON expense_shares (expense_id)',
+        'CREATE INDEX IF NOT EXISTS idx_expense_shares_user_paid ON expense_shares (user_id, is_paid)',
+        'CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members (user_id)',
+    ]),
+    (2, [
+        # Materialized unpaid balances, kept current by BALANCE_TRIGGERS
+        '''CREATE TABLE IF NOT EXISTS group_balances (
+            group_id INTEGER NOT NULL,
+            debtor_id INTEGER NOT NULL,
+            creditor_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (group_id, debtor_id, creditor_id)
+        ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_group_balances_creditor ON group_balances (group_id, creditor_id)',
+        *BALANCE_TRIGGERS,
+        'DELETE FROM group_balances',
+        POPULATE_BALANCES_SQL,
+    ]),
+    (3, [
+        # Money moves from REAL to INTEGER cents. SQLite cannot change a
+        # column's type, so both tables are rebuilt (foreign keys are off
+        # while migrate_db runs).
+        *[f'DROP TRIGGER IF EXISTS {name}' for name in BALANCE_TRIGGER_NAMES],
+        '''CREATE TABLE expenses_new (
+            id INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            date DATE NOT NULL,
+            paid_by INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            FOREIGN KEY (paid_by) REFERENCES users (id),
+            FOREIGN KEY (group_id) REFERENCES expense_groups (id) ON DELETE CASCADE
+        )''',
+        '''INSERT INTO expenses_new (id, description, amount, date, paid_by, group_id, created_at, updated_at)
+        SELECT id, description, CAST(ROUND(amount * 100) AS INTEGER), date, paid_by, group_id, created_at, updated_at
+        FROM expenses''',
+        '''CREATE TABLE expense_shares_new (
+            id INTEGER PRIMARY KEY,
+            expense_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            is_paid BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            FOREIGN KEY (expense_id) REFERENCES expenses (id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+        '''INSERT INTO expense_shares_new (id, expense_id, user_id, amount, is_paid, created_at, updated_at)
+        SELECT id, expense_id, user_id, CAST(ROUND(amount * 100) AS INTEGER), is_paid, created_at, updated_at
+        FROM expense_shares''',
+        _reallocate_rounded_shares,
+        'DROP TABLE expense_shares',
+        'DROP TABLE expenses',
+        'ALTER TABLE expenses_new RENAME TO expenses',
+        'ALTER TABLE expense_shares_new RENAME TO expense_shares',
+        'CREATE INDEX IF NOT EXISTS idx_expenses_group_paid_by ON expenses (group_id, paid_by)',
+        'CREATE INDEX IF NOT EXISTS idx_expense_shares_expense ON expense_shares (expense_id)',
+        'CREATE INDEX IF NOT EXISTS idx_expense_shares_user_paid ON expense_shares (user_id, is_paid)',
+        'DROP TABLE IF EXISTS group_balances',
+        '''CREATE TABLE group_balances (
+            group_id INTEGER NOT NULL,
+            debtor_id INTEGER NOT NULL,
+            creditor_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            PRIMARY KEY (group_id, debtor_id, creditor_id)
+        ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_group_balances_creditor ON group_balances (group_id, creditor_id)',
+        *BALANCE_TRIGGERS,
+        POPULATE_BALANCES_SQL,
+    ]),
+    (4, [
+        # keyset pagination walks a group's expenses by descending id
+        'CREATE INDEX IF NOT EXISTS idx_expenses_group_id ON expenses (group_id, id)',
+    ]),
+    (5, [
+        # Append-only payment ledger; amount is cents from_user -> to_user,
+        # negative for a reversal
+        '''CREATE TABLE IF NOT EXISTS settlements (
+            id INTEGER PRIMARY KEY,
+            group_id INTEGER NOT NULL,
+            from_user_id INTEGER NOT NULL,
+            to_user_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            note TEXT,
+            created_at TIMESTAMP,
+            FOREIGN KEY (group_id) REFERENCES expense_groups (id) ON DELETE CASCADE,
+            FOREIGN KEY (from_user_id) REFERENCES users (id),
+            FOREIGN KEY (to_user_id) REFERENCES users (id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_settlements_group ON settlements (group_id, id)',
+        # Per-pair settled totals of a group through ledger row settlement_id;
+        # every row of a group carries the same settlement_id
+        '''CREATE TABLE IF NOT EXISTS settlement_checkpoints (
+            group_id INTEGER NOT NULL,
+            from_user_id INTEGER NOT NULL,
+            to_user_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            settlement_id INTEGER NOT NULL,
+            PRIMARY KEY (group_id, from_user_id, to_user_id),
+            FOREIGN KEY (group_id) REFERENCES expense_groups (id) ON DELETE CASCADE
+        ) WITHOUT ROWID''',
+        MIGRATE_PAID_SHARES_SQL,
+        *[f'DROP TRIGGER IF EXISTS {name}' for name in BALANCE_TRIGGER_NAMES],
+        *GROSS_BALANCE_TRIGGERS,
+        *LEDGER_TRIGGERS,
+        'DELETE FROM group_balances',
+        POPULATE_GROSS_BALANCES_SQL,
+        _checkpoint_all_groups,
+    ]),
+    (6, [
+        # Materialized per-payer totals, kept current by PAID_TOTAL_TRIGGERS
+        '''CREATE TABLE IF NOT EXISTS group_paid_totals (
+            group_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            PRIMARY KEY (group_id, user_id)
+        ) WITHOUT ROWID''',
+        *PAID_TOTAL_TRIGGERS,
+        'DELETE FROM group_paid_totals',
+        POPULATE_PAID_TOTALS_SQL,
+    ]),
+]
+
+def get_schema_version(conn):
+    """Return the schema version stored in PRAGMA user_version"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate_db(conn):
+    """Apply every pending migration in order, one transaction per version.
+
+    Returns:
+        The schema version after migrating.
+    """
+    current = get_schema_version(conn)
+    pending = [(version, steps) for version, steps in MIGRATIONS if version > current]
+    if not pending:
+        return current
+
+    # Table rebuilds drop and rename tables, which must not trigger cascades.
+    # The pragma is a no-op inside a transaction, so flip it around the loop.
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        for version, steps in pending:
+            # DDL does not open an implicit transaction, so begin one explicitly
+            conn.execute('BEGIN')
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                violations = conn.execute('PRAGMA foreign_key_check').fetchall()
+                if violations:
+                    raise sqlite3.IntegrityError(
+                        f"Migration {version} broke {len(violations)} foreign key(s)")
+                # PRAGMA does not accept bound parameters; version is an int literal
+                conn.execute(f'PRAGMA user_version = {int(version)}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            current = version
+    finally:
+        conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('ANALYZE')  # refresh planner statistics for the new indexes
+    return current
+
+# Row-to-model mapping
+# Model fields that need a Python-side conversion after loading
+FIELD_CONVERTERS = {
+    ExpenseShare: {"is_paid": bool},
+}
+
+def model_columns(model, prefix='', fields=None, raw=()):
+    """
+    Build the SELECT list for a model's fields, e.g. "u.id AS id, ...".
+
+    fields limits the columns fetched (the rest stay None on the model);
+    fields named in raw are selected as +column, which has no declared type,
+    so PARSE_DECLTYPES leaves them as the stored text instead of converting.
+    """
+    fields = model.__slots__ if fields is None else fields
+    unknown = set(fields) - set(model.__slots__)
+    if unknown:
+        raise ValueError(f"{model.__name__} has no field(s) {sorted(unknown)}")
+    parts = []
+    for field in fields:
+        column = f"{prefix}{field}"
+        parts.append(f"+{column} AS {field}" if field in raw else f"{column} AS {field}")
+    return ", ".join(parts)
+
+def model_row_factory(model):
+    """
+    Return a sqlite3 row_factory that builds `model` instances straight from
+    row tuples, matching columns to fields by name. __init__ is bypassed, so
+    no defaults (like datetime.now()) are computed for hydrated objects.
+    """
+    fields = model.__slots__
+    converters = FIELD_CONVERTERS.get(model, {})
+    new = model.__new__
+    plan_cache = [None]  # (description, [(index, field, converter)], missing fields)
+
+    def factory(cursor, row):
+        cached = plan_cache[0]
+        if cached is None or cached[0] is not cursor.description:
+            names = [column[0] for column in cursor.description]
+            plan = [(i, name, converters.get(name)) for i, name in enumerate(names) if name in fields]
+            missing = [field for field in fields if field not in names]
+            cached = plan_cache[0] = (cursor.description, plan, missing)
+
+        obj = new(model)
+        for field in cached[2]:
+            setattr(obj, field, None)
+        for i, field, convert in cached[1]:
+            value = row[i]
+            setattr(obj, field, convert(value) if convert is not None and value is not None else value)
+        return obj
+    return factory
+
+_ROW_FACTORIES = {model: model_row_factory(model) for model in (User, ExpenseGroup, Expense, ExpenseShare)}
+
+USER_COLUMNS = model_columns(User)
+GROUP_COLUMNS = model_columns(ExpenseGroup)
+EXPENSE_COLUMNS = model_columns(Expense)
+SHARE_COLUMNS = model_columns(ExpenseShare)
+
+def _model_cursor(conn, model):
+    """A cursor whose rows come back as `model` instances"""
+    cursor = conn.cursor()
+    cursor.row_factory = _ROW_FACTORIES[model]
+    return cursor
+
 # User operations
 def insert_user(conn, user):
     """Insert a new user into the database"""
@@ -112,52 +720,21 @@ def insert_user(conn, user):
 
 def get_user_by_id(conn, user_id):
     """Get a user by their ID"""
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    row = cursor.fetchone()
-    if row:
-        return User(
-            id=row['id'],
-            username=row['username'],
-            first_name=row['first_name'],
-            last_name=row['last_name'],
-            email=row['email'],
-            created_at=row['created_at']
-        )
-    return None
+    cursor = _model_cursor(conn, User)
+    cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE id = ?', (user_id,))
+    return cursor.fetchone()
 
 def get_user_by_username(conn, username):
     """Get a user by their username"""
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-    row = cursor.fetchone()
-    if row:
-        return User(
-            id=row['id'],
-            username=row['username'],
-            first_name=row['first_name'],
-            last_name=row['last_name'],
-            email=row['email'],
-            created_at=row['created_at']
-        )
-    return None
+    cursor = _model_cursor(conn, User)
+    cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE username = ?', (username,))
+    return cursor.fetchone()
 
 def get_all_users(conn):
     """Get all users from the database"""
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users')
-
-    users = []
-    for row in cursor.fetchall():
-        users.append(User(
-            id = row['id'],
-            username=row['username'],
-            first_name=row['first_name'],
-            last_name=row['last_name'],
-            email=row['email'],
-            created_at=row['created_at']
-        ))
-    return users
+    cursor = _model_cursor(conn, User)
+    cursor.execute(f'SELECT {USER_COLUMNS} FROM users')
+    return cursor.fetchall()
 
 def update_user(conn, user):
     """Update a user's information"""
@@ -189,49 +766,56 @@ def insert_expense_group(conn, group):
 
 def get_expense_group(conn, group_id):
     """Get an expense group by ID"""
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM expense_groups WHERE id = ?', (group_id,))
-    row = cursor.fetchone()
-    if row:
-        return ExpenseGroup(
-            id=row['id'],
-            name=row['name'],
-            description=row['description'],
-            created_by=row['created_by'],
-            created_at=row['created_at']
-        )
-    return None
+    cursor = _model_cursor(conn, ExpenseGroup)
+    cursor.execute(f'SELECT {GROUP_COLUMNS} FROM expense_groups WHERE id = ?', (group_id,))
+    return cursor.fetchone()
 
 def get_all_expense_groups(conn):
+    cursor = _model_cursor(conn, ExpenseGroup)
+    cursor.execute(f'SELECT {GROUP_COLUMNS} FROM expense_groups')
+    return cursor.fetchall()
+
+def get_all_groups_with_creators(conn):
+    """
+    Return every expense group joined to its creator's username, together with
+    its member count and total spend, in a single query.
+    """
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM expense_groups')
-    return [ExpenseGroup(
-        id=row['id'],
-        name=row['name'],
-        description=row['description'],
-        created_by=row['created_by'],
-        created_at=row['created_at']
-    ) for row in cursor.fetchall()]
+    cursor.execute('''
+    SELECT eg.id, eg.name, eg.description, eg.created_by, eg.created_at,
+           u.username AS creator_username,
+           (SELECT COUNT(*) FROM group_members gm
+             WHERE gm.group_id = eg.id) AS member_count,
+           (SELECT COALESCE(SUM(e.amount), 0) FROM expenses e
+             WHERE e.group_id = eg.id) AS total_spent
+    FROM expense_groups eg
+    LEFT JOIN users u ON u.id = eg.created_by
+    ORDER BY eg.id
+    ''')
+
+    groups = []
+    for row in cursor.fetchall():
+        groups.append({
+            "id":               row["id"],
+            "name":             row["name"],
+            "description":      row["description"],
+            "created_by":       row["created_by"],
+            "created_at":       row["created_at"],
+            "creator_username": row["creator_username"],
+            "member_count":     row["member_count"],
+            "total_spent":      row["total_spent"],
+        })
+    return groups
 
 def get_user_groups(conn, user_id):
     """Get all groups a user is a member of"""
-    cursor = conn.cursor()
-    cursor.execute('''
-    SELECT eg.* FROM expense_groups eg
+    cursor = _model_cursor(conn, ExpenseGroup)
+    cursor.execute(f'''
+    SELECT {model_columns(ExpenseGroup, prefix='eg.')} FROM expense_groups eg
     JOIN group_members gm ON eg.id = gm.group_id
     WHERE gm.user_id = ?
     ''', (user_id,))
-    
-    groups = []
-    for row in cursor.fetchall():
-        groups.append(ExpenseGroup(
-            id=row['id'],
-            name=row['name'],
-            description=row['description'],
-            created_by=row['created_by'],
-            created_at=row['created_at']
-        ))
-    return groups
+    return cursor.fetchall()
 
 def update_expense_group(conn, group):
     """Update an expense group's information"""
@@ -272,26 +856,53 @@ def remove_group_member(conn, group_id, user_id):
         WHERE group_id = ? AND user_id = ?
         ''', (group_id, user_id))
 
+def _group_member_ids(conn, group_id):
+    cursor = conn.execute('SELECT user_id FROM group_members WHERE group_id = ?', (group_id,))
+    return {row[0] for row in cursor}
+
+def add_group_members_bulk(conn, group_id, user_ids):
+    """Add many users to a group with one executemany; returns the ids actually added"""
+    joined_at = datetime.datetime.now()
+    with conn:
+        current = _group_member_ids(conn, group_id)
+        added = [uid for uid in dict.fromkeys(user_ids) if uid not in current]
+        conn.executemany('''
+        INSERT INTO group_members (group_id, user_id, joined_at)
+        VALUES (?, ?, ?)
+        ''', [(group_id, uid, joined_at) for uid in added])
+    return added
+
+def set_group_members(conn, group_id, user_ids):
+    """
+    Make a group's membership exactly `user_ids`. The diff against the current
+    members is applied with one executemany for additions and one for removals,
+    in one transaction. Returns {"added": [...], "removed": [...]}.
+    """
+    wanted = dict.fromkeys(user_ids)
+    joined_at = datetime.datetime.now()
+    with conn:
+        current = _group_member_ids(conn, group_id)
+        added = [uid for uid in wanted if uid not in current]
+        removed = sorted(uid for uid in current if uid not in wanted)
+        conn.executemany('''
+        DELETE FROM group_members
+        WHERE group_id = ? AND user_id = ?
+        ''', [(group_id, uid) for uid in removed])
+        conn.executemany('''
+        INSERT INTO group_members (group_id, user_id, joined_at)
+        VALUES (?, ?, ?)
+        ''', [(group_id, uid, joined_at) for uid in added])
+    return {"added": added, "removed": removed}
+
 def get_group_members(conn, group_id):
     """Get all members of a group"""
-    cursor = conn.cursor()
-    cursor.execute('''
-    SELECT u.* FROM users u
+    cursor = _model_cursor(conn, User)
+    cursor.execute(f'''
+    SELECT {model_columns(User, prefix='u.')} FROM users u
     JOIN group_members gm ON u.id = gm.user_id
     WHERE gm.group_id = ?
     ''', (group_id,))
-    
-    members = []
-    for row in cursor.fetchall():
-        members.append(User(
-            id=row['id'],
-            username=row['username'],
-            first_name=row['first_name'],
-            last_name=row['last_name'],
-            email=row['email'],
-            created_at=row['created_at']
-        ))
-    return members
+    return cursor.fetchall()
 
 # Expense operations
 def insert_expense(conn, expense):
@@ -305,39 +916,147 @@ def insert_expense(conn, expense):
               expense.paid_by, expense.group_id, expense.created_at))
     return cursor.lastrowid
 
+def _inserted_ids(conn, count):
+    """Ids of the last `count` rows inserted by one executemany.
+
+    Tables use plain INTEGER PRIMARY KEY ids and the rows are inserted inside a
+    single write transaction, so SQLite hands out consecutive max(id) + 1 values.
+    """
+    if not count:
+        return []
+    last = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+    return list(range(last - count + 1, last + 1))
+
+def insert_expenses_bulk(conn, expenses):
+    """Insert many expenses with one executemany; returns their ids in order"""
+    rows = [(expense.description, expense.amount, expense.date,
+             expense.paid_by, expense.group_id, expense.created_at) for expense in expenses]
+    with conn:
+        conn.executemany('''
+        INSERT INTO expenses (description, amount, date, paid_by, group_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        return _inserted_ids(conn, len(rows))
+
 def get_expense(conn, expense_id):
     """Get an expense by ID"""
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM expenses WHERE id = ?', (expense_id,))
-    row = cursor.fetchone()
-    if row:
-        return Expense(
-            id=row['id'],
-            description=row['description'],
-            amount=row['amount'],
-            date=row['date'],
-            paid_by=row['paid_by'],
-            group_id=row['group_id'],
-            created_at=row['created_at']
-        )
-    return None
+    cursor = _model_cursor(conn, Expense)
+    cursor.execute(f'SELECT {EXPENSE_COLUMNS} FROM expenses WHERE id = ?', (expense_id,))
+    return cursor.fetchone()
 
 def get_group_expenses(conn, group_id):
     """Get all expenses for a group"""
-    cursor = conn.cursor()
-    cursor.execute('''SELECT * FROM expenses WHERE group_id = ? ORDER BY id DESC''', (group_id,))
-    expenses = []
+    cursor = _model_cursor(conn, Expense)
+    cursor.execute(f'''SELECT {EXPENSE_COLUMNS} FROM expenses WHERE group_id = ? ORDER BY id DESC''', (group_id,))
+    return cursor.fetchall()
+
+def get_group_expenses_page(conn, group_id, after_id=None, limit=100,
+                            date_from=None, date_to=None, paid_by=None):
+    """
+    Get one page of a group's expenses, newest first, using keyset pagination.
+
+    Pass the id of the last expense of the previous page as `after_id` to get
+    the next page. date_from/date_to are inclusive; paid_by filters by payer.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+
+    clauses, params = ['group_id = ?'], [group_id]
+    if after_id is not None:
+        clauses.append('id < ?')
+        params.append(after_id)
+    if date_from is not None:
+        clauses.append('date >= ?')
+        params.append(date_from)
+    if date_to is not None:
+        clauses.append('date <= ?')
+        params.append(date_to)
+    if paid_by is not None:
+        clauses.append('paid_by = ?')
+        params.append(paid_by)
+    params.append(limit)
+
+    cursor = _model_cursor(conn, Expense)
+    cursor.execute(f'''
+    SELECT {EXPENSE_COLUMNS} FROM expenses
+    WHERE {' AND '.join(clauses)}
+    ORDER BY id DESC
+    LIMIT ?
+    ''', params)
+    return cursor.fetchall()
+
+EXPENSE_SUMMARY_SQL = '''
+    SELECT e.id, e.description, e.amount, e.date, e.paid_by,
+           u.username AS payer_username,
+           COALESCE(SUM(CASE WHEN es.is_paid = 0 THEN es.amount END), 0) AS unmarked
+    FROM expenses e
+    JOIN users u ON u.id = e.paid_by
+    LEFT JOIN expense_shares es ON es.expense_id = e.id
+    WHERE {where}
+    GROUP BY e.id
+    ORDER BY e.id DESC
+'''
+
+def _expense_summaries(cursor):
+    summaries = []
     for row in cursor.fetchall():
-        expenses.append(Expense(
-            id=row['id'],
-            description=row['description'],
-            amount=row['amount'],
-            date=row['date'],
-            paid_by=row['paid_by'],
-            group_id=row['group_id'],
-            created_at=row['created_at']
-        ))
-    return expenses
+        summaries.append({
+            "id":             row["id"],
+            "description":    row["description"],
+            "amount":         row["amount"],
+            "date":           row["date"],
+            "paid_by":        row["paid_by"],
+            "payer_username": row["payer_username"],
+            "unmarked":       row["unmarked"],
+        })
+    return summaries
+
+def get_group_expense_summaries(conn, group_id):
+    """
+    Return every expense of a group with its payer's username and the total
+    of its shares not marked paid ("unmarked"), newest first, from a single
+    query. That is share status only: what members owe comes from the
+    settlements ledger per pair (get_outstanding_debts), not per expense.
+    """
+    cursor = conn.cursor()
+    cursor.execute(EXPENSE_SUMMARY_SQL.format(where='e.group_id = ?'), (group_id,))
+    return _expense_summaries(cursor)
+
+def get_group_expense_summaries_window(conn, group_id, offset=0, limit=100):
+    """
+    Return the expense summaries at positions [offset, offset + limit) of the
+    newest-first order used by get_group_expense_summaries.
+
+    The window's ids are picked by walking idx_expenses_group_id alone, so
+    shares are only joined and summed for the rows actually returned; any
+    position can be fetched directly, which is what a scrolling list needs.
+    """
+    if limit <= 0 or offset < 0:
+        raise ValueError("offset must be non-negative and limit positive.")
+
+    cursor = conn.cursor()
+    cursor.execute(EXPENSE_SUMMARY_SQL.format(where='''e.id IN (
+        SELECT id FROM expenses WHERE group_id = ?
+        ORDER BY id DESC LIMIT ? OFFSET ?)'''), (group_id, limit, offset))
+    return _expense_summaries(cursor)
+
+def get_expense_summaries(conn, expense_ids):
+    """
+    Return the summaries of the given expenses, newest first, in the same shape
+    as get_group_expense_summaries; used to re-read just the rows a write touched.
+    """
+    expense_ids = list(expense_ids)
+    if not expense_ids:
+        return []
+    cursor = conn.cursor()
+    cursor.execute(EXPENSE_SUMMARY_SQL.format(where=f"e.id IN ({', '.join('?' * len(expense_ids))})"),
+                   expense_ids)
+    return _expense_summaries(cursor)
+
+def count_group_expenses(conn, group_id):
+    """Return how many expenses a group has"""
+    cursor = conn.execute('SELECT COUNT(*) FROM expenses WHERE group_id = ?', (group_id,))
+    return cursor.fetchone()[0]
 
 def update_expense(conn, expense):
     """Update an expense's information"""
@@ -358,141 +1077,383 @@ def delete_expense(conn, expense_id):
 
 # ExpenseShare operations
 def insert_expense_share(conn, share):
-    """Insert a new expense share"""
+    """Insert a new expense share; is_paid=True goes through the ledger as in mark_share_as_paid"""
     cursor = conn.cursor()
     with conn:
         cursor.execute('''
         INSERT INTO expense_shares (expense_id, user_id, amount, is_paid, created_at)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (share.expense_id, share.user_id, share.amount, 
-              share.is_paid, share.created_at))
+        VALUES (?, ?, ?, 0, ?)
+        ''', (share.expense_id, share.user_id, share.amount, share.created_at))
+        if share.is_paid:
+            _set_share_paid(conn, cursor.lastrowid, True)
     return cursor.lastrowid
 
+def insert_expense_shares_bulk(conn, shares):
+    """
+    Insert many expense shares with one executemany; returns their ids in order.
+    is_paid is written as given and adds no ledger payment, so only set it on
+    the payer's own share.
+    """
+    rows = [(share.expense_id, share.user_id, share.amount,
+             share.is_paid, share.created_at) for share in shares]
+    with conn:
+        conn.executemany('''
+        INSERT INTO expense_shares (expense_id, user_id, amount, is_paid, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        return _inserted_ids(conn, len(rows))
+
 def get_expense_shares(conn, expense_id):
     """Get all shares for an expense"""
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM expense_shares WHERE expense_id = ?', (expense_id,))
-    
-    shares = []
-    for row in cursor.fetchall():
-        shares.append(ExpenseShare(
-            id=row['id'],
-            expense_id=row['expense_id'],
-            user_id=row['user_id'],
-            amount=row['amount'],
-            is_paid=bool(row['is_paid']),
-            created_at=row['created_at']
-        ))
-    return shares
+    cursor = _model_cursor(conn, ExpenseShare)
+    cursor.execute(f'SELECT {SHARE_COLUMNS} FROM expense_shares WHERE expense_id = ?', (expense_id,))
+    return cursor.fetchall()
+
+def get_share_expense(conn, share_id):
+    """Get the expense a share belongs to, or None if there is no such share"""
+    cursor = _model_cursor(conn, Expense)
+    cursor.execute(f'''
+    SELECT {model_columns(Expense, prefix='e.')} FROM expenses e
+    JOIN expense_shares es ON es.expense_id = e.id
+    WHERE es.id = ?
+    ''', (share_id,))
+    return cursor.fetchone()
 
 def update_expense_share(conn, share):
+    """Overwrite a share's amount; a change of is_paid goes through the ledger as in mark_share_as_paid"""
     with conn:
         cur = conn.execute('''
         UPDATE expense_shares
-        SET amount = ?, is_paid = ?, updated_at = ?
+        SET amount = ?, updated_at = ?
         WHERE id = ?
-        ''', (share.amount, share.is_paid, datetime.datetime.now(), share.id))
-        return cur.rowcount > 0
+        ''', (share.amount, datetime.datetime.now(), share.id))
+        if cur.rowcount == 0:
+            return False
+        _set_share_paid(conn, share.id, share.is_paid)
+        return True
 
 def mark_share_as_paid(conn, share_id, is_paid=True):
-    """Mark an expense share as paid or unpaid"""
+    """
+    Mark an expense share as paid or unpaid. Marking appends a ledger payment
+    from the share's user to the expense payer of the share amount, capped at
+    what the pair still owes, so a partial payment or an earlier settle is not
+    counted twice. Unmarking reverses the share amount, capped at what the
+    pair has settled, so a debt never flips direction.
+    """
     with conn:
-        cur = conn.execute('''
-        UPDATE expense_shares
-        SET is_paid = ?, updated_at = ?
-        WHERE id = ?
-        ''', (is_paid, datetime.datetime.now(), share_id))
-        return cur.rowcount > 0
+        return _set_share_paid(conn, share_id, is_paid)
+
+def _set_share_paid(conn, share_id, is_paid):
+    # mark_share_as_paid without a transaction of its own, for the share writers above
+    row = conn.execute('''
+    SELECT es.user_id, es.amount, es.is_paid, e.group_id, e.paid_by
+    FROM expense_shares es
+    JOIN expenses e ON e.id = es.expense_id
+    WHERE es.id = ?
+    ''', (share_id,)).fetchone()
+    if row is not None and bool(row["is_paid"]) != bool(is_paid) and row["user_id"] != row["paid_by"]:
+        pair = (row["user_id"], row["paid_by"])
+        if is_paid:
+            amount = min(row["amount"], max(get_outstanding_debts(conn, row["group_id"]).get(pair, 0), 0))
+        else:
+            amount = -min(row["amount"], max(get_settled_totals(conn, row["group_id"]).get(pair, 0), 0))
+        if amount:
+            _append_settlements(conn, row["group_id"], [(*pair, amount)],
+                                note='share marked paid' if is_paid else 'share marked unpaid')
+    cur = conn.execute('''
+    UPDATE expense_shares
+    SET is_paid = ?, updated_at = ?
+    WHERE id = ?
+    ''', (bool(is_paid), datetime.datetime.now(), share_id))
+    return cur.rowcount > 0
 
 def delete_expense_share(conn, share_id):
     with conn:
         conn.execute('DELETE FROM expense_shares WHERE id = ?', (share_id,))
 
+def replace_expense_shares(conn, expense_id, shares):
+    """
+    Make an expense's share set exactly `shares`, a {user_id: (amount, is_paid)}
+    dict. The current shares are diffed against it: changed rows are updated in
+    place, new users inserted and missing users deleted, one executemany each,
+    all in one transaction. Returns {"inserted": n, "updated": n, "deleted": n}.
+    """
+    now = datetime.datetime.now()
+    with conn:
+        current = {share.user_id: share for share in get_expense_shares(conn, expense_id)}
+
+        inserts, updates, deletes = [], [], []
+        for user_id, (amount, is_paid) in shares.items():
+            share = current.get(user_id)
+            if share is None:
+                inserts.append((expense_id, user_id, amount, bool(is_paid), now))
+            elif share.amount != amount or share.is_paid != bool(is_paid):
+                updates.append((amount, bool(is_paid), now, share.id))
+        for user_id, share in current.items():
+            if user_id not in shares:
+                deletes.append((share.id,))
+
+        conn.executemany('DELETE FROM expense_shares WHERE id = ?', deletes)
+        conn.executemany('''
+        UPDATE expense_shares
+        SET amount = ?, is_paid = ?, updated_at = ?
+        WHERE id = ?
+        ''', updates)
+        conn.executemany('''
+        INSERT INTO expense_shares (expense_id, user_id, amount, is_paid, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', inserts)
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
 def get_user_balances(conn, group_id, user_id):
     """Calculate how much a user owes or is owed in a group"""
-    cursor = conn.cursor()
-    
-    # What the user has paid
-    cursor.execute('''
-    SELECT SUM(amount) as total_paid
-    FROM expenses
-    WHERE group_id = ? AND paid_by = ?
-    ''', (group_id, user_id))
-    paid_row = cursor.fetchone()
-    total_paid = paid_row['total_paid'] if paid_row['total_paid'] else 0
-    
-    # What the user owes
-    cursor.execute('''
-    SELECT SUM(es.amount) as total_owed
-    FROM expense_shares es
-    JOIN expenses e ON es.expense_id = e.id
-    WHERE e.group_id = ? AND es.user_id = ? AND es.is_paid = 0
-    ''', (group_id, user_id))
-    owed_row = cursor.fetchone()
-    total_owed = owed_row['total_owed'] if owed_row['total_owed'] else 0
-    
-    return {
-        'paid': total_paid,
-        'owed': total_owed,
-        'balance': total_paid - total_owed
-    }
+    return user_balances_from_matrix(get_group_balance_matrix(conn, group_id), user_id)
 
 def get_user_owes_whom(conn, group_id, user_id):
     """Calculate how much a user owes to each other user"""
-    cursor = conn.cursor()
-    cursor.execute('''
-    SELECT u.id, u.username, u.first_name, u.last_name, SUM(es.amount) as amount_owed
-    FROM expense_shares es
-    JOIN expenses e ON es.expense_id = e.id
-    JOIN users u ON e.paid_by = u.id
-    WHERE e.group_id = ? AND es.user_id = ? AND es.is_paid = 0 AND e.paid_by != ?
-    GROUP BY e.paid_by
-    ''', (group_id, user_id, user_id))
-    
-    owes_to = []
-    for row in cursor.fetchall():
-        owes_to.append({
-            'user_id': row['id'],
-            'username': row['username'],
-            'name': f"{row['first_name']} {row['last_name']}",
-            'amount': row['amount_owed']
-        })
-    return owes_to
+    return user_owes_whom_from_matrix(get_group_balance_matrix(conn, group_id), user_id)
 
 def get_user_is_owed_by(conn, group_id, user_id):
     """
     Return how much each member owes TO the given user inside the group.
     """
+    return user_is_owed_by_from_matrix(get_group_balance_matrix(conn, group_id), user_id)
+
+def get_group_balance_matrix(conn, group_id):
+    """
+    Compute every balance of a group in one pass over group_balances,
+    group_paid_totals and the group's settled totals, so the cost grows with
+    members and pairs rather than with the group's expense history.
+
+    Returns a dict with:
+        users:  {user_id: {"username", "name"}} for members and anyone with
+                expenses or shares in the group
+        debts:  {debtor_id: {creditor_id: amount}} outstanding amounts, i.e.
+                gross share debts less settlements
+        net:    [{"debtor", "creditor", "amount"}] pairwise net debts (> 0)
+        totals: {user_id: {"paid", "owed", "balance"}} as in get_user_balances
+    """
     cursor = conn.cursor()
     cursor.execute('''
-    SELECT u.id, u.username, u.first_name, u.last_name,
-           SUM(es.amount) AS amount_owed_to_user
-    FROM expense_shares es
-    JOIN expenses e ON es.expense_id = e.id
-    JOIN users u ON es.user_id = u.id          -- debtor
-    WHERE e.group_id = ?
-      AND e.paid_by  = ?                      -- selected user is the payer
-      AND es.is_paid = 0
-      AND es.user_id != ?
-    GROUP BY es.user_id
-    ''', (group_id, user_id, user_id))
+    SELECT debtor_id AS debtor, creditor_id AS creditor, amount
+    FROM group_balances
+    WHERE group_id = ?
+    UNION ALL
+    SELECT NULL, user_id, amount      -- debtor NULL marks a paid total
+    FROM group_paid_totals
+    WHERE group_id = ?
+    ''', (group_id, group_id))
 
-    results = []
+    gross, paid = {}, {}
     for row in cursor.fetchall():
+        debtor, creditor, amount = row["debtor"], row["creditor"], row["amount"] or 0
+        if debtor is None:
+            paid[creditor] = amount
+        else:
+            gross[(debtor, creditor)] = amount
+
+    settled = get_settled_totals(conn, group_id)
+    debts, owed = {}, {}
+    for (debtor, creditor), amount in _outstanding(gross, settled).items():
+        if amount < 0:  # overpaid: the creditor now owes the debtor
+            debtor, creditor, amount = creditor, debtor, -amount
+        row = debts.setdefault(debtor, {})
+        row[creditor] = row.get(creditor, 0) + amount
+        owed[debtor] = owed.get(debtor, 0) + amount
+
+    # members plus former members who still paid, owe or are owed something
+    participants = set(paid)
+    for debtor, creditor in (*gross, *settled):
+        participants.update((debtor, creditor))
+    cursor.execute(f'''
+    SELECT u.id, u.username, u.first_name, u.last_name
+    FROM users u
+    WHERE u.id IN (SELECT user_id FROM group_members WHERE group_id = ?)
+       OR u.id IN ({', '.join('?' * len(participants))})
+    ORDER BY u.id
+    ''', (group_id, *participants))
+    users = {
+        row["id"]: {"username": row["username"],
+                    "name": f"{row['first_name']} {row['last_name']}"}
+        for row in cursor.fetchall()
+    }
+
+    totals = {}
+    for uid in users:
+        user_paid, user_owed = paid.get(uid, 0), owed.get(uid, 0)
+        totals[uid] = {"paid": user_paid, "owed": user_owed, "balance": user_paid - user_owed}
+
+    net = []
+    for debtor, row in debts.items():
+        for creditor, amount in row.items():
+            if debtor == creditor:
+                continue
+            diff = amount - debts.get(creditor, {}).get(debtor, 0)
+            if diff > 0:
+                net.append({"debtor": debtor, "creditor": creditor, "amount": diff})
+
+    return {"users": users, "debts": debts, "net": net, "totals": totals}
+
+def user_balances_from_matrix(matrix, user_id):
+    """get_user_balances, answered from a get_group_balance_matrix result"""
+    return dict(matrix["totals"].get(user_id, {"paid": 0, "owed": 0, "balance": 0}))
+
+def user_owes_whom_from_matrix(matrix, user_id):
+    """get_user_owes_whom, answered from a get_group_balance_matrix result"""
+    owes_to = []
+    for creditor, amount in sorted(matrix["debts"].get(user_id, {}).items()):
+        if creditor == user_id:
+            continue
+        user = matrix["users"].get(creditor, {"username": None, "name": None})
+        owes_to.append({
+            "user_id":  creditor,
+            "username": user["username"],
+            "name":     user["name"],
+            "amount":   amount,
+        })
+    return owes_to
+
+def user_is_owed_by_from_matrix(matrix, user_id):
+    """get_user_is_owed_by, answered from a get_group_balance_matrix result"""
+    results = []
+    for debtor in sorted(matrix["debts"]):
+        if debtor == user_id or user_id not in matrix["debts"][debtor]:
+            continue
+        user = matrix["users"].get(debtor, {"username": None, "name": None})
         results.append({
-            "user_id":  row["id"],
-            "username": row["username"],
-            "name":     f'{row["first_name"]} {row["last_name"]}',
-            "amount":   row["amount_owed_to_user"],
+            "user_id":  debtor,
+            "username": user["username"],
+            "name":     user["name"],
+            "amount":   matrix["debts"][debtor][user_id],
         })
     return results
 
+# Settlement ledger
+# Payments are appended to `settlements` and never changed. A group's settled
+# totals are read as its latest checkpoint plus the ledger rows after it, and
+# record_settlements folds the tail into a new checkpoint once it reaches
+# SETTLEMENT_CHECKPOINT_INTERVAL rows, so reading a balance costs the same no
+# matter how many payments a group has seen.
+SETTLEMENT_CHECKPOINT_INTERVAL = 256
+
+def get_settled_totals(conn, group_id):
+    """{(from_user_id, to_user_id): cents} settled in a group: checkpoint + ledger tail"""
+    totals, through = {}, 0
+    cursor = conn.execute('''
+    SELECT from_user_id, to_user_id, amount, settlement_id
+    FROM settlement_checkpoints
+    WHERE group_id = ?
+    ''', (group_id,))
+    for from_id, to_id, amount, settlement_id in cursor:
+        totals[(from_id, to_id)] = amount
+        through = max(through, settlement_id)
+
+    cursor = conn.execute('''
+    SELECT from_user_id, to_user_id, SUM(amount)
+    FROM settlements
+    WHERE group_id = ? AND id > ?
+    GROUP BY from_user_id, to_user_id
+    ''', (group_id, through))
+    for from_id, to_id, amount in cursor:
+        totals[(from_id, to_id)] = totals.get((from_id, to_id), 0) + amount
+    return totals
+
+def _outstanding(gross, settled):
+    """Gross pair debts less settled totals, without the pairs that are even"""
+    outstanding = dict(gross)
+    for pair, amount in settled.items():
+        outstanding[pair] = outstanding.get(pair, 0) - amount
+    return {pair: amount for pair, amount in outstanding.items() if amount}
+
+def get_outstanding_debts(conn, group_id):
+    """
+    {(debtor_id, creditor_id): cents} still owed in a group: gross share debts
+    less what was settled for the pair. Negative means the pair was overpaid.
+    """
+    cursor = conn.execute('''
+    SELECT debtor_id, creditor_id, amount FROM group_balances WHERE group_id = ?
+    ''', (group_id,))
+    gross = {(debtor, creditor): amount for debtor, creditor, amount in cursor}
+    return _outstanding(gross, get_settled_totals(conn, group_id))
+
+def _write_checkpoint(conn, group_id):
+    through = conn.execute('SELECT MAX(id) FROM settlements WHERE group_id = ?',
+                           (group_id,)).fetchone()[0]
+    if through is None:
+        return 0
+    totals = get_settled_totals(conn, group_id)
+    conn.executemany('''
+    INSERT INTO settlement_checkpoints (group_id, from_user_id, to_user_id, amount, settlement_id)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (group_id, from_user_id, to_user_id)
+    DO UPDATE SET amount = excluded.amount, settlement_id = excluded.settlement_id
+    ''', [(group_id, from_id, to_id, amount, through) for (from_id, to_id), amount in totals.items()])
+    return through
+
+def checkpoint_settlements(conn, group_id):
+    """Fold a group's ledger tail into its checkpoint; returns the last ledger id covered"""
+    with conn:
+        return _write_checkpoint(conn, group_id)
+
+def _append_settlements(conn, group_id, payments, note=None):
+    # no transaction of its own, so the settle functions stay atomic on any connection
+    now = datetime.datetime.now()
+    rows = [(group_id, from_id, to_id, amount, note, now) for from_id, to_id, amount in payments]
+    conn.executemany('''
+    INSERT INTO settlements (group_id, from_user_id, to_user_id, amount, note, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    ids = _inserted_ids(conn, len(rows))
+    if ids:
+        through = conn.execute('''
+        SELECT COALESCE(MAX(settlement_id), 0) FROM settlement_checkpoints WHERE group_id = ?
+        ''', (group_id,)).fetchone()[0]
+        tail = conn.execute('SELECT COUNT(*) FROM settlements WHERE group_id = ? AND id > ?',
+                            (group_id, through)).fetchone()[0]
+        if tail >= SETTLEMENT_CHECKPOINT_INTERVAL:
+            _write_checkpoint(conn, group_id)
+    return ids
+
+def record_settlements(conn, group_id, payments, note=None):
+    """
+    Append payments [(from_user_id, to_user_id, cents)] to a group's ledger
+    with one executemany and return their ids. A negative amount reverses an
+    earlier payment. Checkpoints the group when its tail has grown long.
+    """
+    with conn:
+        return _append_settlements(conn, group_id, payments, note)
+
+def get_group_settlements(conn, group_id, before_id=None, limit=100):
+    """One page of a group's ledger, newest first; pass the last id as before_id for the next"""
+    cursor = conn.execute('''
+    SELECT id, from_user_id, to_user_id, amount, note, created_at
+    FROM settlements
+    WHERE group_id = ? AND (? IS NULL OR id < ?)
+    ORDER BY id DESC
+    LIMIT ?
+    ''', (group_id, before_id, before_id, limit))
+    return [{
+        "id":           row["id"],
+        "from_user_id": row["from_user_id"],
+        "to_user_id":   row["to_user_id"],
+        "amount":       row["amount"],
+        "note":         row["note"],
+        "created_at":   row["created_at"],
+    } for row in cursor.fetchall()]
+
 def settle_user_pair(conn, group_id, debtor_id, creditor_id):
     """
-    Mark all shares between debtor and creditor as paid.
+    Pay off everything still owed between debtor and creditor, in both
+    directions, and mark their shares as paid.
     """
     now = datetime.datetime.now()
     with conn:
+        outstanding = get_outstanding_debts(conn, group_id)
+        _append_settlements(conn, group_id, [
+            (from_id, to_id, outstanding[(from_id, to_id)])
+            for from_id, to_id in ((debtor_id, creditor_id), (creditor_id, debtor_id))
+            if (from_id, to_id) in outstanding
+        ], note='settled pair')
         cur = conn.execute(
             '''
             UPDATE expense_shares AS es
@@ -514,17 +1475,231 @@ def settle_user_pair(conn, group_id, debtor_id, creditor_id):
         )
         return cur.rowcount  # Number of shares marked as paid
 
-def initialize_db(db_path='expenses.db'):
-    """Initialize the database with all tables"""
-    conn = connect_db(db_path)
+def settle_group_shares(conn, group_id):
+    """
+    Settle everything in a group; like settle_group but returns only the
+    number of shares marked as paid.
+    """
+    return settle_group(conn, group_id)["shares"]
+
+def _settle(conn, scope, params, group_ids=(), user_id=None, note='settled'):
+    """
+    Settle in one transaction. `scope` is a WHERE clause over expenses (alias
+    e) choosing the expenses; with user_id only pairs involving the user are
+    settled. For every group in group_ids everything outstanding is paid off;
+    otherwise (a cutoff date) a pair is paid the unpaid shares in scope, but
+    never more than it still owes. The shares in scope are then marked paid
+    with one UPDATE. Ledger rows carry `note`.
+    """
+    params = dict(params, user_id=user_id, now=datetime.datetime.now())
+    touches_user = '' if user_id is None else 'AND (es.user_id = :user_id OR e.paid_by = :user_id)'
+    with conn:
+        cursor = conn.execute(f'''
+        SELECT e.group_id, es.user_id AS debtor_id, e.paid_by AS creditor_id,
+               COUNT(*) AS shares, SUM(es.amount) AS amount
+        FROM expenses e
+        JOIN expense_shares es ON es.expense_id = e.id
+        WHERE {scope} AND es.is_paid = 0 {touches_user}
+        GROUP BY e.group_id, es.user_id, e.paid_by
+        ''', params)
+        pairs, unpaid = {}, {}
+        for row in cursor.fetchall():
+            pair = (row["debtor_id"], row["creditor_id"])
+            pairs[pair] = pairs.get(pair, 0) + row["shares"]
+            unpaid.setdefault(row["group_id"], {})[pair] = row["amount"]
+
+        paid = {}
+        for group_id in set(group_ids) | set(unpaid):
+            outstanding = get_outstanding_debts(conn, group_id)
+            if group_id in group_ids:
+                payments = [(debtor, creditor, amount) for (debtor, creditor), amount in outstanding.items()
+                            if user_id is None or user_id in (debtor, creditor)]
+            else:
+                payments = []
+                for (debtor, creditor), amount in unpaid[group_id].items():
+                    amount = min(amount, outstanding.get((debtor, creditor), 0))
+                    if amount > 0:
+                        payments.append((debtor, creditor, amount))
+            _append_settlements(conn, group_id, payments, note=note)
+            for debtor, creditor, amount in payments:
+                paid[(debtor, creditor)] = paid.get((debtor, creditor), 0) + amount
+
+        if user_id is None:
+            target = f'expense_id IN (SELECT e.id FROM expenses e WHERE {scope})'
+        else:
+            target = f'''(
+                (user_id = :user_id AND expense_id IN (SELECT e.id FROM expenses e WHERE {scope}))
+             OR expense_id IN (SELECT e.id FROM expenses e WHERE {scope} AND e.paid_by = :user_id)
+            )'''
+        cur = conn.execute(f'''
+        UPDATE expense_shares
+        SET is_paid = 1, updated_at = :now
+        WHERE is_paid = 0 AND {target}
+        ''', params)
+    return {"shares": cur.rowcount, "pairs": pairs, "paid": paid}
+
+def settle_group(conn, group_id, until=None, note='settled'):
+    """
+    Pay off everything owed in a group, or with `until` only what the unpaid
+    shares of expenses dated on or before it add up to, and mark those shares
+    paid. Returns {"shares": n, "pairs": {(debtor_id, creditor_id): shares},
+    "paid": {(debtor_id, creditor_id): cents}}.
+    """
+    scope = 'e.group_id = :group_id'
+    if until is not None:
+        scope += ' AND e.date <= :until'
+    return _settle(conn, scope, {"group_id": group_id, "until": until},
+                   group_ids=[group_id] if until is None else [], note=note)
+
+def settle_user_all(conn, user_id, group_id=None, until=None):
+    """
+    Like settle_group, for everything the user owes or is owed, in one group
+    or in all of them.
+    """
+    scope = 'e.group_id = :group_id' if group_id is not None else '1'
+    if until is not None:
+        scope += ' AND e.date <= :until'
+    group_ids = []
+    if until is None:
+        if group_id is not None:
+            group_ids = [group_id]
+        else:
+            cursor = conn.execute('''
+            SELECT group_id FROM group_members WHERE user_id = ?
+            UNION
+            SELECT group_id FROM group_balances WHERE debtor_id = ? OR creditor_id = ?
+            ''', (user_id, user_id, user_id))
+            group_ids = [row[0] for row in cursor]
+    return _settle(conn, scope, {"group_id": group_id, "until": until},
+                   group_ids=group_ids, user_id=user_id)
+
+def rebuild_group_balances(conn):
+    """Recompute group_balances and group_paid_totals from expenses and shares from scratch"""
+    with conn:
+        conn.execute('DELETE FROM group_paid_totals')
+        conn.execute(POPULATE_PAID_TOTALS_SQL)
+        conn.execute('DELETE FROM group_balances')
+        cur = conn.execute(POPULATE_GROSS_BALANCES_SQL)
+        return cur.rowcount  # Number of balance rows written
+
+def verify_group_balances(conn):
+    """
+    Compare group_balances with a fresh aggregate of expense_shares.
+    Returns a list of mismatching rows; empty means the table is consistent.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    SELECT e.group_id, es.user_id AS debtor_id, e.paid_by AS creditor_id,
+           SUM(es.amount) AS amount
+    FROM expense_shares es
+    JOIN expenses e ON es.expense_id = e.id
+    WHERE es.user_id != e.paid_by
+    GROUP BY e.group_id, es.user_id, e.paid_by
+    ''')
+    expected = {(row['group_id'], row['debtor_id'], row['creditor_id']): row['amount']
+                for row in cursor.fetchall()}
+    cursor.execute('SELECT group_id, debtor_id, creditor_id, amount FROM group_balances')
+    actual = {(row['group_id'], row['debtor_id'], row['creditor_id']): row['amount']
+              for row in cursor.fetchall()}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want, have = expected.get(key, 0), actual.get(key, 0)
+        if want != have:
+            group_id, debtor_id, creditor_id = key
+            mismatches.append({
+                "group_id":    group_id,
+                "debtor_id":   debtor_id,
+                "creditor_id": creditor_id,
+                "expected":    want,
+                "actual":      have,
+            })
+    return mismatches
+
+# Streaming reads
+# iter_* mirror the list-returning getters above but pull rows with fetchmany
+# and yield models lazily, so memory stays bounded by batch_size. The caller
+# must keep the connection open until the iterator is exhausted or closed.
+# fields/raw are passed to model_columns to fetch or convert fewer columns.
+DEFAULT_BATCH_SIZE = 500
+
+def _iter_models(conn, model, sql, params, batch_size):
+    """Run a query and yield `model` instances, batch_size rows at a time"""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+    cursor = _model_cursor(conn, model)
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+def iter_all_users(conn, batch_size=DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream all users"""
+    return _iter_models(conn, User, f'SELECT {model_columns(User, fields=fields, raw=raw)} FROM users',
+                        (), batch_size)
+
+def iter_all_expense_groups(conn, batch_size=DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream all expense groups"""
+    return _iter_models(conn, ExpenseGroup,
+                        f'SELECT {model_columns(ExpenseGroup, fields=fields, raw=raw)} FROM expense_groups',
+                        (), batch_size)
+
+def iter_user_groups(conn, user_id, batch_size=DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the groups a user is a member of"""
+    return _iter_models(conn, ExpenseGroup, f'''
+    SELECT {model_columns(ExpenseGroup, prefix='eg.', fields=fields, raw=raw)} FROM expense_groups eg
+    JOIN group_members gm ON eg.id = gm.group_id
+    WHERE gm.user_id = ?
+    ''', (user_id,), batch_size)
+
+def iter_group_members(conn, group_id, batch_size=DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the members of a group"""
+    return _iter_models(conn, User, f'''
+    SELECT {model_columns(User, prefix='u.', fields=fields, raw=raw)} FROM users u
+    JOIN group_members gm ON u.id = gm.user_id
+    WHERE gm.group_id = ?
+    ''', (group_id,), batch_size)
+
+def iter_group_expenses(conn, group_id, batch_size=DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the expenses of a group, newest first"""
+    return _iter_models(conn, Expense, f'''
+    SELECT {model_columns(Expense, fields=fields, raw=raw)} FROM expenses
+    WHERE group_id = ? ORDER BY id DESC
+    ''', (group_id,), batch_size)
+
+def iter_expense_shares(conn, expense_id, batch_size=DEFAULT_BATCH_SIZE, fields=None, raw=()):
+    """Stream the shares of an expense"""
+    return _iter_models(conn, ExpenseShare, f'''
+    SELECT {model_columns(ExpenseShare, fields=fields, raw=raw)} FROM expense_shares
+    WHERE expense_id = ?
+    ''', (expense_id,), batch_size)
+
+def initialize_db(db_path='expenses.db', profile=None):
+    """Initialize the database with all tables and upgrade it to the latest schema"""
+    conn = connect_db(db_path, profile=profile)
     create_tables(conn)
+    migrate_db(conn)
     conn.close()
 
 # Run this if the script is executed directly
 if __name__ == "__main__":
+    import sys
+
     initialize_db()
     print("Database initialized successfully!")
 
+    if "--rebuild-balances" in sys.argv[1:]:
+        conn = connect_db()
+        print(f"Rebuilt {rebuild_group_balances(conn)} balance rows")
+        mismatches = verify_group_balances(conn)
+        print("Balances verified" if not mismatches else f"Balance mismatches: {mismatches}")
+        conn.close()
+
     def print_table_counts(conn):
         cursor = conn.cursor()
         for table in ['users', 'expense_groups', 'expenses', 'group_members', 'expense_shares']:
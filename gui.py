@@ -1,7 +1,14 @@
 import tkinter as tk
 from tkinter import messagebox
+from tkinter import font as tkfont
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import math
+import queue
+import traceback
 import app
 import re
+from models import to_cents, format_cents, allocate_cents
 
 # === Theme Settings ===
 THEMES = {
@@ -37,6 +44,10 @@ FONTS = {
 
 FONT_SIZES = {"S": 11, "M": 12, "L": 13}
 
+# Widget options that may hold a theme color; restyle_widgets() remaps them in place
+COLOR_OPTIONS = ("background", "foreground", "activebackground", "activeforeground",
+                 "selectbackground", "selectcolor", "insertbackground")
+
 BG_COLOR = THEMES["Classic"]["bg"]
 FG_COLOR = THEMES["Classic"]["fg"]
 OH_COLOR = THEMES["Classic"]["oh"]
@@ -44,6 +55,275 @@ OH_COLOR = THEMES["Classic"]["oh"]
 FONT_FAMILY = "Cascadia Mono"
 FONT_SIZE   = 12
 
+# Dynamic frames kept per group and refreshed in place when shown again;
+# the other dynamic frames are forms, rebuilt on every visit
+CACHED_FRAMES = ("selected_group", "group_balances")
+FRAME_CACHE_SIZE = 8  # cached frames kept, least recently shown are destroyed first
+
+POLL_MS = 30  # how often the Tk loop collects finished background jobs
+
+# App change events that make the user lists and the group lists stale;
+# the group lists show each creator's username
+USER_EVENTS = (app.USER_CREATED, app.USER_UPDATED, app.USER_DELETED)
+GROUP_LIST_EVENTS = (app.GROUP_CREATED, app.GROUP_UPDATED, app.GROUP_DELETED,
+                     app.USER_UPDATED, app.USER_DELETED)
+
+class BackgroundWorker:
+    """Runs app.* calls off the Tk thread and hands their results back to it.
+
+    Jobs are keyed by (owner, name, ...), where owner names the frame they
+    belong to. Submitting under a key that is still pending supersedes the old
+    job, and cancel() drops the jobs of frames that are being thrown away, so
+    late results are discarded instead of painted onto a stale frame.
+    Callbacks always run on the Tk thread, from a root.after poll, and so do
+    the app change events handed to listen().
+    """
+    def __init__(self, root):
+        self.root = root
+        # a single thread runs jobs in submission order, so a reload queued after a write sees it
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+        self.done = queue.SimpleQueue()
+        self.events = queue.SimpleQueue()
+        self.enqueue_event = self.events.put  # runs on whichever thread committed the write
+        self.listener = None
+        self.jobs = {}
+        self.after_id = self.root.after(POLL_MS, self.poll)
+
+    def listen(self, handler):
+        """Pass every committed app change to handler(event) on the Tk thread"""
+        self.listener = handler
+        app.subscribe(self.enqueue_event)
+
+    def submit(self, key, fn, args=(), callback=None, widget=None, cancel=True):
+        """Run fn(*args) on the worker and pass its result to callback.
+
+        The callback is skipped if `widget` has been destroyed by then. Writes
+        should pass cancel=False: they always run, only their callback is dropped.
+        If fn raises, the error is shown in a messagebox instead; a failed write
+        is shown even when its callback was dropped.
+        """
+        self.discard(key)
+        future = self.executor.submit(fn, *args)
+        self.jobs[key] = (future, cancel)
+        future.add_done_callback(lambda f: self.done.put((key, f, callback, widget, cancel)))
+        return future
+
+    def discard(self, key):
+        future, cancel = self.jobs.pop(key, (None, False))
+        if cancel:
+            future.cancel()
+
+    def cancel(self, *owners):
+        """Drop every pending job of the given owners"""
+        for key in [k for k in self.jobs if k[0] in owners]:
+            self.discard(key)
+
+    def poll(self):
+        # a write publishes before its future completes, so views see the change before its callback runs
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if self.listener is None:
+                continue
+            try:
+                self.listener(event)
+            except Exception:
+                traceback.print_exc()
+        while True:
+            try:
+                key, future, callback, widget, cancel = self.done.get_nowait()
+            except queue.Empty:
+                break
+            current = self.jobs.get(key, (None,))[0] is future
+            if current:
+                del self.jobs[key]
+            error = None if future.cancelled() else future.exception()
+            if error is not None and (current or not cancel):
+                self.report_error(error)
+                continue
+            if not current:
+                continue  # superseded or cancelled
+            if callback is None or (widget is not None and not widget.winfo_exists()):
+                continue
+            try:
+                callback(future.result())
+            except Exception:
+                traceback.print_exc()
+        self.after_id = self.root.after(POLL_MS, self.poll)
+
+    def report_error(self, error):
+        traceback.print_exception(type(error), error, error.__traceback__)
+        messagebox.showerror("Error", f"Something went wrong:\n{error}")
+
+    def shutdown(self):
+        """Stop polling, let queued writes finish and close the worker's connections"""
+        self.root.after_cancel(self.after_id)
+        app.unsubscribe(self.enqueue_event)
+        self.cancel(*{key[0] for key in self.jobs})
+        self.executor.submit(app.close_pool)
+        self.executor.shutdown(wait=True)
+
+PREFETCH_ROWS = 50  # rows fetched above and below the visible ones
+
+class VirtualListbox(tk.Frame):
+    """Scrollable listbox that only holds the rows around the visible window.
+
+    fetch(offset, limit) runs on the worker and returns (total, rows), where
+    rows are the (text, id) pairs at positions offset.. of the full list. The
+    Listbox itself only ever contains `height` lines; scrolling re-renders them
+    from the fetched window and asks for a new window once it runs out.
+    fetch_ids(ids), if given, returns the (text, id) pairs of specific rows and
+    lets refresh_rows() patch rows that changed without moving.
+    """
+    def __init__(self, parent, worker, key, fetch, fetch_ids=None, height=10, **options):
+        super().__init__(parent, bg=options.get("bg"))
+        self.worker, self.key, self.fetch, self.fetch_ids = worker, key, fetch, fetch_ids
+        self.height = height
+        self.total = 0
+        self.top = 0        # position of the first visible row
+        self.rows = {}      # position -> (text, id) for the fetched window
+        self.selection = None  # (position, id) of the selected row
+        self.loading = False
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False, **options)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_wheel)
+        self.listbox.bind("<Button-4>", lambda _e: self.scroll_to(self.top - 3) or "break")
+        self.listbox.bind("<Button-5>", lambda _e: self.scroll_to(self.top + 3) or "break")
+        self.listbox.bind("<Up>", lambda _e: self.move(-1) or "break")
+        self.listbox.bind("<Down>", lambda _e: self.move(1) or "break")
+        self.listbox.bind("<Prior>", lambda _e: self.move(-self.height) or "break")
+        self.listbox.bind("<Next>", lambda _e: self.move(self.height) or "break")
+
+    def reload(self):
+        """Forget the fetched rows and the selection and fetch the current window again"""
+        self.rows = {}
+        self.selection = None
+        self.request()
+
+    def refresh(self):
+        """Fetch the current window again, keeping the scroll position and selection"""
+        self.request(follow_selection=True)
+
+    def refresh_rows(self, ids):
+        """Re-read only the fetched rows with these ids and patch them in place"""
+        positions = {row[1]: pos for pos, row in self.rows.items() if row[1] in ids}
+        if not positions:
+            return  # not fetched yet, so they will be read fresh when scrolled to
+        if self.fetch_ids is None:
+            self.refresh()
+            return
+
+        def patch(rows):
+            for text, row_id in rows:
+                pos = positions.get(row_id)
+                if pos is None or self.rows.get(pos, (None, None))[1] != row_id:
+                    continue  # the window moved on meanwhile
+                self.rows[pos] = (text, row_id)
+                if self.top <= pos < self.top + self.height:
+                    self.listbox.delete(pos - self.top)
+                    self.listbox.insert(pos - self.top, text)
+                    if self.selection and self.selection[0] == pos:
+                        self.listbox.selection_set(pos - self.top)
+
+        self.worker.submit(self.key + ("rows",), self.fetch_ids, (list(positions),),
+                           callback=patch, widget=self)
+
+    def selected_id(self):
+        return self.selection[1] if self.selection else None
+
+    def request(self, follow_selection=False):
+        self.loading = True
+        self.render()
+        offset = max(0, self.top - PREFETCH_ROWS)
+        limit = self.height + 2 * PREFETCH_ROWS
+        self.worker.submit(self.key, self.fetch, (offset, limit),
+                           callback=lambda result: self.loaded(offset, result, follow_selection), widget=self)
+
+    def loaded(self, offset, result, follow_selection=False):
+        self.loading = False
+        self.total, rows = result
+        self.rows = {offset + i: row for i, row in enumerate(rows)}
+        self.top = max(0, min(self.top, self.total - self.height))
+        if self.selection and self.selection[1] is None:
+            if self.selection[0] in self.rows:
+                self.selection = (self.selection[0], self.rows[self.selection[0]][1])
+        elif self.selection and follow_selection:
+            # rows may have shifted since the selection was made; follow its id
+            pos = next((p for p, row in self.rows.items() if row[1] == self.selection[1]), None)
+            self.selection = (pos, self.selection[1]) if pos is not None else None
+        self.render()
+        if self.missing():
+            self.request()  # the list shrank under a window we were past
+
+    def missing(self):
+        end = min(self.top + self.height, self.total)
+        return any(pos not in self.rows for pos in range(self.top, end))
+
+    def render(self):
+        end = min(self.top + self.height, self.total)
+        self.listbox.delete(0, tk.END)
+        if self.loading and not self.rows:
+            self.listbox.insert(tk.END, "Loading…")
+        else:
+            self.listbox.insert(tk.END, *(self.rows.get(pos, ("…", None))[0] for pos in range(self.top, end)))
+        if self.selection and self.top <= self.selection[0] < end:
+            self.listbox.selection_set(self.selection[0] - self.top)
+        if self.total:
+            self.scrollbar.set(self.top / self.total, end / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self.total - self.height))
+        if top == self.top:
+            return
+        self.top = top
+        self.render()
+        if self.missing():
+            self.request()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            self.scroll_to(self.top + int(args[1]) * (self.height if args[2] == "pages" else 1))
+
+    def on_wheel(self, event):
+        # Windows reports 120 per notch, macOS a small delta per step; scroll 3 rows per notch
+        if abs(event.delta) >= 120:
+            notches = event.delta // 120
+        else:
+            notches = 1 if event.delta > 0 else -1 if event.delta < 0 else 0
+        self.scroll_to(self.top - 3 * notches)
+        return "break"
+
+    def move(self, step):
+        """Move the selection by step rows, scrolling to keep it visible"""
+        if not self.total:
+            return
+        pos = max(0, min((self.selection[0] if self.selection else self.top) + step, self.total - 1))
+        self.selection = (pos, self.rows.get(pos, (None, None))[1])
+        if pos < self.top:
+            self.scroll_to(pos)
+        elif pos >= self.top + self.height:
+            self.scroll_to(pos - self.height + 1)
+        self.render()
+
+    def on_select(self, _event):
+        picked = self.listbox.curselection()
+        pos = self.top + int(picked[0]) if picked else None
+        if pos is None or pos not in self.rows:
+            self.selection = None
+        else:
+            self.selection = (pos, self.rows[pos][1])
+
 class ExpenseManagerApp:
     def __init__(self, root):
         self.root = root
@@ -53,6 +333,9 @@ class ExpenseManagerApp:
         self.root.iconbitmap("ExpenseManager.ico")
         self.root.geometry("900x675")
         self.root.configure(bg=BG_COLOR)
+        self.worker = BackgroundWorker(self.root)
+        self.worker.listen(self.on_change)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.static_builders = {
             "home": self.build_home_frame,
@@ -62,6 +345,9 @@ class ExpenseManagerApp:
         }
         self.static_frames = set(self.static_builders)
         self.frames = {}
+        self.frame_cache = OrderedDict()  # (frame name, group id) -> frame
+        self.watches = []  # views of static frames that reload on app change events, see watch()
+        self.current_frame = None
         self.init_frames()
 
         self.build_menubar()
@@ -82,48 +368,141 @@ class ExpenseManagerApp:
             self.frames[name] = builder()
 
     def show_frame(self, name):
+        # form frames we are leaving are thrown away, with any results still on their way to them
+        for other in [n for n in self.frames if n != name and n not in self.static_frames and n not in CACHED_FRAMES]:
+            self.close_frame(self.frames.pop(other))
         for frame in self.frames.values():
             frame.pack_forget()
         self.frames[name].pack(fill="both", expand=True)
+        self.current_frame = name
 
-        self.refresh_static_widgets()
+        self.render_stale(name)
         if name in self.static_frames:
-            self.current_static_frame = name
             self.root.config(menu=self.menubar)
         else:
             self.root.config(menu="")
 
     def open_dynamic_frame(self, frame_name, group_id=None, user_id=None, expense_id=None, share_id=None):
-        if frame_name in self.frames:
-            self.frames[frame_name].destroy()
-
         builder = self.dynamic_builders.get(frame_name)
-        if builder:
+        if not builder:
+            print(f"No builder found for frame: {frame_name}")
+            return
+
+        old = self.frames.pop(frame_name, None)
+        if frame_name in CACHED_FRAMES:
+            frame = self.cached_frame(frame_name, group_id, builder)
+            if old is not None and old is not frame:
+                old.pack_forget()
+        else:
+            if old is not None:
+                self.close_frame(old)
             frame = builder(
                 group_id=group_id,
                 user_id=user_id,
                 expense_id=expense_id,
                 share_id=share_id
             )
-            self.frames[frame_name] = frame
-            self.show_frame(frame_name)
-        else:
-            print(f"No builder found for frame: {frame_name}")
+        self.frames[frame_name] = frame
+        self.show_frame(frame_name)
+
+    def cached_frame(self, frame_name, group_id, builder):
+        """Return the group's cached frame with pending changes applied, building it on first use"""
+        key = (frame_name, group_id)
+        frame = self.frame_cache.get(key)
+        if frame is not None:
+            self.frame_cache.move_to_end(key)
+            self.refresh_frame(frame)
+            return frame
 
-    def repaint_static_frames(self):
-        for name, builder in self.static_builders.items():
-            if name in self.frames:
-                self.frames[name].destroy()
-            self.frames[name] = builder()
-        self.show_frame(self.current_static_frame)
+        frame = builder(group_id=group_id)
+        frame.changes = {}
+        self.frame_cache[key] = frame
+        while len(self.frame_cache) > FRAME_CACHE_SIZE:
+            self.drop_cached_frame(next(iter(self.frame_cache)))
+        return frame
 
-    def refresh_static_widgets(self):
-        if hasattr(self, "existing_groups_listbox"):
-            self.load_groups_listbox(self.existing_groups_listbox)
-        if hasattr(self, "all_groups_listbox"):
-            self.load_groups_listbox(self.all_groups_listbox)
-        if hasattr(self, "creator_dropdown") and hasattr(self, "creator_var"):
-            self.load_users_dropdown(self.creator_dropdown, self.creator_var)
+    def drop_cached_frame(self, key):
+        frame = self.frame_cache.pop(key)
+        if self.frames.get(key[0]) is frame:
+            del self.frames[key[0]]
+        self.close_frame(frame)
+
+    def close_frame(self, frame):
+        self.worker.cancel(str(frame))
+        frame.destroy()
+
+    def note_change(self, group_id, kind, ids=None):
+        """Record that a write touched part of a group for its cached frames.
+
+        kind is "group", "members", "expenses" or "balances"; ids narrows
+        "expenses" to the rows that changed in place, None means any row may
+        have moved. group_id None means every group. Frames apply what they
+        collected the next time they are shown.
+        """
+        for (_, cached_group), frame in self.frame_cache.items():
+            if group_id is not None and cached_group != group_id:
+                continue
+            if ids is None or frame.changes.get(kind, ()) is None:
+                frame.changes[kind] = None
+            else:
+                frame.changes.setdefault(kind, set()).update(ids)
+
+    def forget_groups(self, group_id=None):
+        """Throw away the cached frames of one group, or of every group"""
+        for key in [k for k in self.frame_cache if group_id is None or k[1] == group_id]:
+            self.drop_cached_frame(key)
+
+    def refresh_frame(self, frame):
+        # frames still loading have no refresh yet and keep their changes until they do
+        if frame.changes and hasattr(frame, "refresh"):
+            changes, frame.changes = frame.changes, {}
+            frame.refresh(changes)
+
+    def watch(self, frame_name, kinds, reload):
+        """Call reload() whenever frame_name is shown after an app change of one of kinds.
+
+        The view starts out stale, so it loads the first time its frame is shown.
+        """
+        self.watches.append({"frame": frame_name, "kinds": frozenset(kinds), "reload": reload, "stale": True})
+
+    def render_stale(self, frame_name):
+        for view in self.watches:
+            if view["frame"] == frame_name and view["stale"]:
+                view["stale"] = False
+                view["reload"]()
+
+    def on_change(self, event):
+        """Mark what an app change touched; the shown frame catches up now, the others when shown"""
+        for view in self.watches:
+            if event.kind in view["kinds"]:
+                view["stale"] = True
+
+        group_id = event.group_id
+        if event.kind == app.GROUP_DELETED:
+            self.forget_groups(group_id)
+        elif event.kind == app.GROUP_UPDATED:
+            self.note_change(group_id, "group")
+        elif event.kind == app.MEMBERSHIP_CHANGED:
+            self.note_change(group_id, "members")
+        elif event.kind == app.EXPENSE_UPDATED:
+            self.note_change(group_id, "expenses", event.expense_ids)
+            self.note_change(group_id, "balances")
+        elif event.kind in (app.EXPENSE_CREATED, app.EXPENSE_DELETED, app.SETTLEMENT_RECORDED):
+            self.note_change(group_id, "expenses")
+            self.note_change(group_id, "balances")
+        elif event.kind in (app.USER_UPDATED, app.USER_DELETED):
+            # the user may appear in any group's members, expenses and balances
+            for kind in ("members", "expenses", "balances"):
+                self.note_change(None, kind)
+
+        self.render_stale(self.current_frame)
+        frame = self.frames.get(self.current_frame)
+        if self.current_frame in CACHED_FRAMES and frame is not None:
+            self.refresh_frame(frame)
+
+    def on_close(self):
+        self.worker.shutdown()
+        self.root.destroy()
 
     # ── SETTINGS MENU ───────────────────────────────────────────────
     def build_menubar(self):
@@ -147,62 +526,126 @@ class ExpenseManagerApp:
         self.root.config(menu=self.menubar)
 
     # ── APPLY FUNCTIONS ─────────────────────────────────────────────
+    # Nothing is rebuilt or re-queried here: existing widgets are restyled in
+    # place, and widgets built later pick up the new globals.
     def set_theme(self, name):
         global BG_COLOR, FG_COLOR, OH_COLOR
+        old = {"bg": BG_COLOR, "fg": FG_COLOR, "oh": OH_COLOR}
         BG_COLOR = THEMES[name]["bg"]
         FG_COLOR = THEMES[name]["fg"]
         OH_COLOR = THEMES[name]["oh"]
-        self.apply_theme()
-        self.repaint_static_frames()
+        self.apply_theme(old)
 
     def set_font_family(self, name):
         global FONT_FAMILY
         FONT_FAMILY = FONTS[name]
         self.apply_font()
-        self.repaint_static_frames()
 
     def set_font_size(self, size):
         global FONT_SIZE
         FONT_SIZE = size
         self.apply_font()
-        self.repaint_static_frames()
 
-    def apply_theme(self):
+    def apply_theme(self, old=None):
         self.root.configure(bg=BG_COLOR)
-        self.base_font = (FONT_FAMILY or "Courier", FONT_SIZE)
-        self.title_font = (FONT_FAMILY or "Courier", FONT_SIZE + 2)
-        global FONT, TITLE_FONT
-        FONT = self.base_font
-        TITLE_FONT = self.title_font
+        if old is not None:
+            self.restyle_widgets({old["bg"]: BG_COLOR, old["fg"]: FG_COLOR, old["oh"]: OH_COLOR})
+
+    def restyle_widgets(self, colors):
+        """Swap colors (old -> new) on every live widget, hidden and cached frames included"""
+        stack = [self.root]
+        while stack:
+            widget = stack.pop()
+            stack.extend(widget.winfo_children())
+            options = widget.configure()  # one Tk call for all of a widget's options
+            current = {name: str(options[name][-1]) for name in COLOR_OPTIONS if name in options}
+            changes = {name: colors[value] for name, value in current.items() if value in colors}
+            if changes:
+                widget.configure(**changes)
 
     def apply_font(self):
-        self.base_font = (FONT_FAMILY or "Courier", FONT_SIZE)
-        self.title_font = (FONT_FAMILY or "Courier", FONT_SIZE + 2)
+        # widgets reference these named fonts, so reconfiguring them resizes every widget at once
         global FONT, TITLE_FONT
+        family = FONT_FAMILY or "Courier"
+        if not hasattr(self, "base_font"):
+            self.base_font = tkfont.Font(root=self.root, family=family, size=FONT_SIZE)
+            self.title_font = tkfont.Font(root=self.root, family=family, size=FONT_SIZE + 2)
+        else:
+            self.base_font.configure(family=family, size=FONT_SIZE)
+            self.title_font.configure(family=family, size=FONT_SIZE + 2)
         FONT = self.base_font
         TITLE_FONT = self.title_font
 
     # ── HELPERS ─────────────────────────────────────────────────────
-    def load_groups_listbox(self, listbox):
+    def show_loading(self, listbox):
         listbox.delete(0, tk.END)
-        groups = app.get_all_groups()
-        for group in groups:
-            creator = app.get_user(group.created_by)
-            listbox.insert(tk.END, f"{group.id}: {group.name} (created by {creator.username})")
+        listbox.insert(tk.END, "Loading…")
+
+    def patch_listbox(self, listbox, lines):
+        """Make the listbox show `lines`, rewriting only the rows that differ"""
+        current = listbox.get(0, tk.END)
+        for i, line in enumerate(lines):
+            if i >= len(current):
+                listbox.insert(tk.END, *lines[i:])
+                break
+            if current[i] != line:
+                selected = listbox.selection_includes(i)
+                listbox.delete(i)
+                listbox.insert(i, line)
+                if selected:
+                    listbox.selection_set(i)
+        if len(current) > len(lines):
+            listbox.delete(len(lines), tk.END)
+
+    def listbox_id(self, listbox):
+        """Return the id at the start of the active "id: ..." row, or None while loading"""
+        selected = listbox.get(tk.ACTIVE)
+        head = selected.split(":")[0] if selected else ""
+        return int(head) if head.isdigit() else None
+
+    def load_groups_listbox(self, listbox):
+        def fill(groups):
+            listbox.delete(0, tk.END)
+            for group in groups:
+                listbox.insert(tk.END, f"{group['id']}: {group['name']} (created by {group['creator_username']})")
+
+        self.show_loading(listbox)
+        self.worker.submit(("static", str(listbox)), app.get_all_groups_with_creators,
+                           callback=fill, widget=listbox)
 
     def load_users_dropdown(self, menu_widget, string_var):
-        users = app.get_all_users()
-        menu = menu_widget['menu']
-        menu.delete(0, 'end')
-        if users:
-            for user in users:
-                label = f"{user.username} ({user.first_name} {user.last_name})"
-                menu.add_command(label=label, command=tk._setit(string_var, label))
-            string_var.set(f"{users[0].username} ({users[0].first_name} {users[0].last_name})")
-        else:
-            placeholder = "No users available"
-            menu.add_command(label=placeholder, state="disabled")
-            string_var.set(placeholder)
+        def fill(users):
+            menu = menu_widget['menu']
+            menu.delete(0, 'end')
+            labels = [f"{user.username} ({user.first_name} {user.last_name})" for user in users]
+            menu_widget.label_to_uid = {label: user.id for label, user in zip(labels, users)}
+            if users:
+                for label in labels:
+                    menu.add_command(label=label, command=tk._setit(string_var, label))
+                string_var.set(labels[0])
+            else:
+                placeholder = "No users available"
+                menu.add_command(label=placeholder, state="disabled")
+                string_var.set(placeholder)
+
+        menu_widget.label_to_uid = {}
+        string_var.set("Loading…")
+        self.worker.submit(("static", str(menu_widget)), app.get_all_users,
+                           callback=fill, widget=menu_widget)
+
+    def build_async(self, load, fill):
+        """Return a frame that says "Loading…" until load() has run on the worker,
+        then builds its widgets with fill(frame, data) on the Tk thread"""
+        frame = tk.Frame(self.root, bg=BG_COLOR)
+        loading = tk.Label(frame, text="Loading…", bg=BG_COLOR, fg=FG_COLOR, font=FONT)
+        loading.pack(pady=30)
+
+        def done(data):
+            loading.destroy()
+            fill(frame, data)
+
+        self.worker.submit((str(frame), "frame"), load, callback=done, widget=frame)
+        return frame
 
     def labeled_entry(self, parent, label_text):
         row = tk.Frame(parent, bg=BG_COLOR)
@@ -256,21 +699,18 @@ class ExpenseManagerApp:
                 messagebox.showerror("Validation Error", "Email not valid.")
                 return
             
-            user_id = app.create_user(
-                username=username,
-                first_name=first_name,
-                last_name=last_name,
-                email=email
-            )
-            if user_id:
-                messagebox.showinfo("Success", f"User created with ID {user_id}")
-                username_entry.delete(0, tk.END)
-                first_name_entry.delete(0, tk.END)
-                last_name_entry.delete(0, tk.END)
-                email_entry.delete(0, tk.END)
-                load_users()
-            else:
-                messagebox.showerror("Error", "Failed to create user")
+            def created(user_id):
+                if user_id:
+                    messagebox.showinfo("Success", f"User created with ID {user_id}")
+                    username_entry.delete(0, tk.END)
+                    first_name_entry.delete(0, tk.END)
+                    last_name_entry.delete(0, tk.END)
+                    email_entry.delete(0, tk.END)
+                else:
+                    messagebox.showerror("Error", "Failed to create user")
+
+            self.worker.submit(("user", "create"), app.create_user,
+                               (username, first_name, last_name, email), callback=created, cancel=False)
 
         tk.Button(frame, text="Submit", command=submit_user, bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
 
@@ -279,22 +719,30 @@ class ExpenseManagerApp:
         self.user_listbox.pack(pady=5)
 
         def load_users():
-            self.user_listbox.delete(0, tk.END)
-            users = app.get_all_users()
-            for user in users:
-                self.user_listbox.insert(tk.END, f"{user.id}: {user.username} ({user.first_name} {user.last_name})")
+            def fill(users):
+                self.user_listbox.delete(0, tk.END)
+                for user in users:
+                    self.user_listbox.insert(tk.END, f"{user.id}: {user.username} ({user.first_name} {user.last_name})")
 
-        load_users()
+            self.show_loading(self.user_listbox)
+            self.worker.submit(("static", str(self.user_listbox)), app.get_all_users,
+                               callback=fill, widget=self.user_listbox)
+
+        self.watch("user", USER_EVENTS, load_users)
 
         def delete_selected_user():
-            selected = self.user_listbox.get(tk.ACTIVE)
-            if selected:
-                user_id = int(selected.split(":")[0])
-                if app.delete_user(user_id):
+            user_id = self.listbox_id(self.user_listbox)
+            if user_id is None:
+                return
+
+            def deleted(ok):
+                if ok:
                     messagebox.showinfo("Success", f"User with ID {user_id} deleted.")
-                    load_users()
                 else:
                     messagebox.showerror("Error", "Failed to delete user.")
+
+            self.worker.submit(("user", "delete"), app.delete_user, (user_id,),
+                               callback=deleted, cancel=False)
         
         tk.Button(frame, text="Delete Selected", command=delete_selected_user,
           bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
@@ -324,10 +772,7 @@ class ExpenseManagerApp:
         self.existing_groups_listbox.pack(pady=5)
 
         def submit_group():
-            selected_label = creator_var.get()
-            users = app.get_all_users()
-            selected_user = next((u for u in users if f"{u.username} ({u.first_name} {u.last_name})" == selected_label), None)
-            created_by = selected_user.id if selected_user else None
+            created_by = dropdown.label_to_uid.get(creator_var.get())
 
             name = name_entry.get().strip()
             description = desc_entry.get().strip()
@@ -340,21 +785,19 @@ class ExpenseManagerApp:
                 messagebox.showerror("Validation Error", "Group name must contain only letters, numbers, spaces or . - _")
                 return
 
-            group_id = app.create_group(
-                name=name,
-                description=description,
-                created_by=created_by
-            )
-            if group_id:
-                messagebox.showinfo("Success", f"Group created with ID {group_id}")
-                name_entry.delete(0, tk.END)
-                desc_entry.delete(0, tk.END)
-                self.load_groups_listbox(self.existing_groups_listbox)
-            else:
-                messagebox.showerror("Error", "Failed to create group")
+            def created(group_id):
+                if group_id:
+                    messagebox.showinfo("Success", f"Group created with ID {group_id}")
+                    name_entry.delete(0, tk.END)
+                    desc_entry.delete(0, tk.END)
+                else:
+                    messagebox.showerror("Error", "Failed to create group")
+
+            self.worker.submit(("group", "create"), app.create_group, (name, description, created_by),
+                               callback=created, cancel=False)
 
-        self.load_users_dropdown(self.creator_dropdown, self.creator_var)
-        self.load_groups_listbox(self.existing_groups_listbox)
+        self.watch("group", USER_EVENTS, lambda: self.load_users_dropdown(dropdown, creator_var))
+        self.watch("group", GROUP_LIST_EVENTS, lambda: self.load_groups_listbox(self.existing_groups_listbox))
 
         tk.Button(frame, text="Submit", command=submit_group,
                   bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
@@ -371,34 +814,35 @@ class ExpenseManagerApp:
         self.all_groups_listbox.pack(pady=5)
 
         def access_selected_group():
-            selected = self.all_groups_listbox.get(tk.ACTIVE)
-            if selected:
-                group_id = int(selected.split(":")[0])
+            group_id = self.listbox_id(self.all_groups_listbox)
+            if group_id is not None:
                 self.open_dynamic_frame("selected_group", group_id=group_id)
 
         def delete_selected_group():
-            selected = self.all_groups_listbox.get(tk.ACTIVE)
-            if not selected:
+            group_id = self.listbox_id(self.all_groups_listbox)
+            if group_id is None:
                 return
 
-            group_id = int(selected.split(":")[0])
-            members = app.get_group_members(group_id)
-
-            if members:
-                confirm = messagebox.askyesno(
-                    "Confirm Deletion",
-                    "This group has members. Deleting it will also remove all expenses and shares.\nAre you sure you want to continue?"
-                )
-                if not confirm:
-                    return
-
-            if app.delete_group(group_id):
-                messagebox.showinfo("Success", f"Group with ID {group_id} deleted.")
-                self.load_groups_listbox(self.all_groups_listbox)
-            else:
-                messagebox.showerror("Error", "Failed to delete group.")
-
-        self.load_groups_listbox(self.all_groups_listbox)
+            def deleted(ok):
+                if ok:
+                    messagebox.showinfo("Success", f"Group with ID {group_id} deleted.")
+                else:
+                    messagebox.showerror("Error", "Failed to delete group.")
+
+            def confirm(members):
+                if members:
+                    confirm = messagebox.askyesno(
+                        "Confirm Deletion",
+                        "This group has members. Deleting it will also remove all expenses and shares.\nAre you sure you want to continue?"
+                    )
+                    if not confirm:
+                        return
+                self.worker.submit(("all_groups", "delete"), app.delete_group, (group_id,),
+                                   callback=deleted, cancel=False)
+
+            self.worker.submit(("all_groups", "members"), app.get_group_members, (group_id,), callback=confirm)
+
+        self.watch("all_groups", GROUP_LIST_EVENTS, lambda: self.load_groups_listbox(self.all_groups_listbox))
         self.all_groups_listbox.bind("<Double-Button-1>", lambda _e: access_selected_group())
 
         tk.Button(frame, text="Open Selected", command=access_selected_group,
@@ -410,26 +854,34 @@ class ExpenseManagerApp:
         return frame
 
     def build_open_group_frame(self, group_id=None, **kwargs):
-        frame = tk.Frame(self.root, bg=BG_COLOR)
-        group_info = app.get_expense_group(group_id)
+        return self.build_async(
+            lambda: (app.get_expense_group(group_id), app.get_group_members(group_id)),
+            lambda frame, data: self.fill_open_group_frame(frame, group_id, *data))
+
+    def fill_open_group_frame(self, frame, group_id, group_info, members):
         title = tk.Label(frame, text=group_info.name, bg=BG_COLOR, fg=FG_COLOR, font=TITLE_FONT)
         title.is_title = True
         title.pack(pady=15)
-        tk.Label(frame, text=group_info.description, bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack(pady=5)
-
-        # Fetch and show current group members, manage group members
-        members = app.get_group_members(group_id)
-
-        member_labels = [f"{u.username} ({u.first_name} {u.last_name})" for u in members]
-        if not member_labels:
-            member_labels = ["No members"]
+        description = tk.Label(frame, text=group_info.description, bg=BG_COLOR, fg=FG_COLOR, font=FONT)
+        description.pack(pady=5)
 
+        # Show current group members, manage group members
         member_var = tk.StringVar(frame)
-        member_var.set(member_labels[0])
-
-        member_dropdown = tk.OptionMenu(frame, member_var, *member_labels)
+        member_dropdown = tk.OptionMenu(frame, member_var, "")
         member_dropdown.config(bg=BG_COLOR, fg=FG_COLOR, activebackground=OH_COLOR, font=FONT, highlightthickness=0)
 
+        def show_members():
+            member_labels = [f"{u.username} ({u.first_name} {u.last_name})" for u in members]
+            if not member_labels:
+                member_labels = ["No members"]
+            menu = member_dropdown["menu"]
+            menu.delete(0, "end")
+            for label in member_labels:
+                menu.add_command(label=label, command=tk._setit(member_var, label))
+            member_var.set(member_labels[0])
+
+        show_members()
+
         tk.Label(frame, text="Group Members", bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack()
         member_dropdown.pack()
 
@@ -438,34 +890,39 @@ class ExpenseManagerApp:
         
         # Show and manage expenses
 
-        expense_ids = [] # Local list to track hidden expense IDs
-        def load_expenses_listbox(listbox, group_id):
-            listbox.delete(0, tk.END)
-            expense_ids.clear()
+        # These run on the worker, for each window the list scrolls to and for
+        # rows changed in place; each line is paired with its hidden expense ID
+        def expense_rows(expenses):
+            def format(text, width):
+                return (text[:width - 1] + '…') if len(text) > width else text.ljust(width)
 
-            expenses = app.get_group_expenses(group_id)
-            if expenses:
-                def format(text, width):
-                    return (text[:width - 1] + '…') if len(text) > width else text.ljust(width)
+            rows = []
+            for expense in expenses:
+                payer = format(expense["payer_username"], 11)
+                desc = format(expense["description"], 11)
+                amount = f"{format_cents(expense['amount']):>6}€"
 
-                for expense in expenses:
-                    payer_user = app.get_user(expense.paid_by)
-                    payer = format(payer_user.username, 11)
-                    desc = format(expense.description, 11)
-                    amount = f"{expense.amount:6.2f}€"
+                # share status only; what is still owed is on the balances screen
+                unmarked = expense["unmarked"]
+                share_summary = "Shares not marked paid:" if unmarked > 0 else "All shares marked paid"
+                unmarked_total = f"{format_cents(unmarked):>6}€" if unmarked > 0 else ""
 
-                    shares = app.get_expense_shares(expense.id)
-                    unpaid = sum(share.amount for share in shares if not share.is_paid)
-                    
-                    owed_summary = f"{payer} is owed:" if unpaid > 0 else "Expense is settled"
-                    owed_total = f"{unpaid:6.2f}€" if unpaid > 0 else ""
+                display = f" {expense['date']}  {desc} | {payer} paid: {amount} | {share_summary} {unmarked_total}"
+                rows.append((display, expense["id"]))
+            return rows
 
-                    display = f" {expense.date}  {desc} | {payer} paid: {amount} | {owed_summary} {owed_total}"
-                    listbox.insert(tk.END, display)
-                    expense_ids.append(expense.id)
+        def fetch_expenses(offset, limit):
+            rows = expense_rows(app.get_group_expense_summaries_window(group_id, offset, limit))
+            return app.count_group_expenses(group_id) or 0, rows
+
+        def fetch_expense_rows(expense_ids):
+            return expense_rows(app.get_expense_summaries(expense_ids))
+
+        def selected_expense_id():
+            return expenses_listbox.selected_id()
 
         def open_create_expense():
-            if not app.get_group_members(group_id):
+            if not members:
                 messagebox.showerror(
                     "Error",
                     "Group has no members - add users first."
@@ -474,29 +931,28 @@ class ExpenseManagerApp:
             self.open_dynamic_frame("create_expense", group_id=group_id)
 
         def delete_selected_expense():
-            selected = self.expenses_listbox.curselection()
-            if not selected:
+            expense_id = selected_expense_id()
+            if expense_id is None:
                 return
-            idx = int(selected[0])
-            expense_id = expense_ids[idx]
 
-            if messagebox.askyesno("Confirm", "Delete this expense and all its shares?"):
-                if app.delete_expense(expense_id):
+            def deleted(ok):
+                if ok:
                     messagebox.showinfo("Deleted", "Expense deleted.")
-                    load_expenses_listbox(self.expenses_listbox, group_id)
                 else:
                     messagebox.showerror("Error", "Could not delete expense.")
 
+            if messagebox.askyesno("Confirm", "Delete this expense and all its shares?"):
+                self.worker.submit((str(frame), "delete"), app.delete_expense, (expense_id,),
+                                   callback=deleted, cancel=False)
+
         def edit_selected_expense():
-            selected = self.expenses_listbox.curselection()
-            if not selected:
+            expense_id = selected_expense_id()
+            if expense_id is None:
                 return
-            idx = int(selected[0])
-            expense_id = expense_ids[idx]
             self.open_dynamic_frame("update_expense", group_id=group_id, expense_id=expense_id)
 
         def open_group_balances():
-            if not app.get_group_members(group_id):
+            if not members:
                 messagebox.showerror(
                     "Error",
                     "Group has no members - add users first."
@@ -506,9 +962,32 @@ class ExpenseManagerApp:
 
         tk.Label(frame, text="All Expenses", bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack(pady=10)
 
-        self.expenses_listbox = tk.Listbox(frame, width=85, bg=BG_COLOR, fg=FG_COLOR, font=FONT, selectbackground=OH_COLOR)
-        self.expenses_listbox.pack(pady=10)
-        load_expenses_listbox(self.expenses_listbox, group_id)
+        expenses_listbox = VirtualListbox(frame, self.worker, (str(frame), "expenses"), fetch_expenses,
+                                          fetch_ids=fetch_expense_rows, width=85,
+                                          bg=BG_COLOR, fg=FG_COLOR, font=FONT, selectbackground=OH_COLOR)
+        expenses_listbox.pack(pady=10)
+        expenses_listbox.reload()
+
+        # Applies the changes noted for this group while the frame was hidden
+        def refresh(changes):
+            def update_header(data):
+                nonlocal members
+                group_info, members = data
+                title.config(text=group_info.name)
+                description.config(text=group_info.description)
+                show_members()
+
+            if "group" in changes or "members" in changes:
+                self.worker.submit((str(frame), "header"),
+                                   lambda: (app.get_expense_group(group_id), app.get_group_members(group_id)),
+                                   callback=update_header, widget=frame)
+            if "expenses" in changes:
+                if changes["expenses"] is None:
+                    expenses_listbox.refresh()
+                else:
+                    expenses_listbox.refresh_rows(changes["expenses"])
+
+        frame.refresh = refresh
 
         button_row = tk.Frame(frame, bg=BG_COLOR)
         button_row.pack(pady=10, padx=35, fill="x")
@@ -531,36 +1010,30 @@ class ExpenseManagerApp:
                 bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(side="left", padx=5)
         tk.Button(right_buttons, text="Back", command=lambda: self.show_frame("all_groups"),
                 bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(side="right", padx=5)
-    
-        return frame
 
     def build_add_users_frame(self, group_id=None, **kwargs):
-        frame = tk.Frame(self.root, bg=BG_COLOR)
+        return self.build_async(
+            lambda: (app.get_all_users(), app.get_group_members(group_id)),
+            lambda frame, data: self.fill_add_users_frame(frame, group_id, *data))
 
+    def fill_add_users_frame(self, frame, group_id, users, members):
         tk.Label(frame, text="Add Users to Group", bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack(pady=10)
 
         # Dictionary to track checkbox variables by user_id
         self.user_check_vars = {}
 
-        users = app.get_all_users()
-        members = app.get_group_members(group_id)
         member_ids = {m.id for m in members}
 
+        # toggles are only recorded here; Save applies the whole diff at once
         for user in users:
             var = tk.BooleanVar()
             var.set(user.id in member_ids)
-
-            def on_toggle(u=user, v=var):
-                if v.get():
-                    app.add_member(group_id=group_id, user_id=u.id)
-                else:
-                    app.remove_member(group_id=group_id, user_id=u.id)
+            self.user_check_vars[user.id] = var
 
             cb = tk.Checkbutton(
                 frame,
                 text=f"{user.username} ({user.first_name} {user.last_name})",
                 variable=var,
-                command=on_toggle,
                 bg=BG_COLOR,
                 fg=FG_COLOR,
                 font=FONT,
@@ -570,17 +1043,27 @@ class ExpenseManagerApp:
             )
             cb.pack(anchor="w")
 
+        def save_members():
+            def saved(result):
+                if result is None:
+                    messagebox.showerror("Error", "Failed to update group members."); return
+                self.open_dynamic_frame("selected_group", group_id=group_id)
+
+            selected = [uid for uid, v in self.user_check_vars.items() if v.get()]
+            self.worker.submit((str(frame), "save"), app.set_group_members, (group_id, selected),
+                               callback=saved, cancel=False)
+
+        tk.Button(frame, text="Save", command=save_members,
+                  bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
         tk.Button(frame, text="Back", command=lambda: self.open_dynamic_frame("selected_group", group_id=group_id),
                   bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack()
 
-        return frame
-
     def build_create_expense_frame(self, group_id=None, **kwargs):
-        frame = tk.Frame(self.root, bg=BG_COLOR)
+        return self.build_async(
+            lambda: (app.get_expense_group(group_id), app.get_group_members(group_id)),
+            lambda frame, data: self.fill_create_expense_frame(frame, group_id, *data))
 
-        # ---------- Data ----------
-        group   = app.get_expense_group(group_id)
-        members = app.get_group_members(group_id)
+    def fill_create_expense_frame(self, frame, group_id, group, members):
 
         tk.Label(frame, text=f"New Expense for '{group.name}'",
                 bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack(pady=10)
@@ -677,7 +1160,7 @@ class ExpenseManagerApp:
             if not desc:
                 messagebox.showerror("Validation", "Description is required."); return
             try:
-                amount = float(amt_str)
+                amount = to_cents(amt_str)
             except ValueError:
                 messagebox.showerror("Validation", "Amount must be numeric."); return
             if amount <= 0:
@@ -695,35 +1178,37 @@ class ExpenseManagerApp:
                     if not val:
                         messagebox.showerror("Validation", "Custom split missing values."); return
                     try:
-                        val_f = float(val)
+                        val_f = to_cents(val) if amount_type.get() == "amount" else float(val)
                     except ValueError:
                         messagebox.showerror("Validation", "Custom values must be numeric."); return
+                    if amount_type.get() == "percent" and not (math.isfinite(val_f) and val_f >= 0):
+                        messagebox.showerror("Validation", "Percentages must be numbers of 0 or more."); return
                     shares_dict[uid] = val_f
 
                 # validate totals --------------------
                 total_input = sum(shares_dict.values())
-                if amount_type.get() == "amount" and abs(total_input - amount) > 1e-2:
+                if amount_type.get() == "amount" and total_input != amount:
                     messagebox.showerror("Validation", "Shares must sum to total amount."); return
-                if amount_type.get() == "percent" and abs(total_input - 100) > 1e-2:
-                    messagebox.showerror("Validation", "Percent split must add up to 100%."); return
+                if amount_type.get() == "percent":
+                    if abs(total_input - 100) > 1e-2:
+                        messagebox.showerror("Validation", "Percent split must add up to 100%."); return
+                    shares_dict = dict(zip(shares_dict, allocate_cents(amount, shares_dict.values())))
 
             selected = [uid for uid, v in check_vars.items() if v.get()]
             if payer_id not in selected:
                 messagebox.showerror("Validation", "Payer must be included in the split."); return
 
             # create expense -------------------------
-            expense_id = app.create_expense_with_shares(
-                description=desc,
-                amount=amount,
-                paid_by=payer_id,
-                group_id=group_id,
-                shares_dict=shares_dict
-            )
-            if not expense_id:
-                messagebox.showerror("Error", "Failed to create expense."); return
+            def created(expense_id):
+                if not expense_id:
+                    messagebox.showerror("Error", "Failed to create expense."); return
 
-            messagebox.showinfo("Success", "Expense added!")
-            self.open_dynamic_frame("selected_group", group_id=group_id)
+                messagebox.showinfo("Success", "Expense added!")
+                self.open_dynamic_frame("selected_group", group_id=group_id)
+
+            self.worker.submit((str(frame), "save"), app.create_expense_with_shares,
+                               (desc, amount, payer_id, group_id, shares_dict),
+                               callback=created, cancel=False)
 
         tk.Button(frame, text="Add Expense", command=submit_expense,
                 bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=10)
@@ -731,21 +1216,20 @@ class ExpenseManagerApp:
                 command=lambda: self.open_dynamic_frame("selected_group", group_id=group_id),
                 bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
 
-        return frame
-
     def build_update_expense_frame(self, group_id=None, expense_id=None, **kwargs):
-        frame = tk.Frame(self.root, bg=BG_COLOR)
-
         if expense_id is None:
+            frame = tk.Frame(self.root, bg=BG_COLOR)
             tk.Label(frame, text="No expense selected.", bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack(pady=10)
             tk.Button(frame, text="Back", command=lambda: self.open_dynamic_frame("selected_group", group_id=group_id),
                       bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
             return frame
 
-        group   = app.get_expense_group(group_id)
-        expense = app.get_expense(expense_id)
-        members = app.get_group_members(group_id)
-        shares  = app.get_expense_shares(expense_id)
+        return self.build_async(
+            lambda: (app.get_expense_group(group_id), app.get_expense(expense_id),
+                     app.get_group_members(group_id), app.get_expense_shares(expense_id)),
+            lambda frame, data: self.fill_update_expense_frame(frame, group_id, expense_id, *data))
+
+    def fill_update_expense_frame(self, frame, group_id, expense_id, group, expense, members, shares):
         existing_user_ids = {s.user_id for s in shares}
         user_share_map = {s.user_id: s for s in shares}
         share_values = [s.amount for s in shares]
@@ -753,7 +1237,7 @@ class ExpenseManagerApp:
         if share_values:
             max_val = max(share_values)
             min_val = min(share_values)
-            is_even_split = abs(max_val - min_val) < 1e-2
+            is_even_split = max_val - min_val <= 1  # cents left over by an even split
 
         tk.Label(frame, text=f"Update Expense in '{group.name}'", bg=BG_COLOR, fg=FG_COLOR, font=FONT).pack(pady=10)
 
@@ -761,10 +1245,7 @@ class ExpenseManagerApp:
         description_entry.insert(0, expense.description or "")
 
         amount_entry = self.labeled_entry(frame, "Total Amount (€)")
-        try:
-            amount_entry.insert(0, f"{float(expense.amount):.2f}")
-        except Exception:
-            amount_entry.insert(0, str(expense.amount))
+        amount_entry.insert(0, format_cents(expense.amount))
 
         # payer dropdown
         payer_labels = [f"{u.username} ({u.first_name} {u.last_name})" for u in members]
@@ -806,7 +1287,7 @@ class ExpenseManagerApp:
             row = tk.Frame(members_frame, bg=BG_COLOR)
             row.pack(anchor="w")
             chk_var = tk.BooleanVar(value=(u.id in existing_user_ids))
-            ent_initial = f"{user_share_map[u.id].amount:.2f}" if u.id in user_share_map else ""
+            ent_initial = format_cents(user_share_map[u.id].amount) if u.id in user_share_map else ""
             ent_var = tk.StringVar(value=ent_initial)
             tk.Checkbutton(row, text=username, variable=chk_var, width=15, anchor="w",
                            bg=BG_COLOR, fg=FG_COLOR, selectcolor=BG_COLOR,
@@ -849,17 +1330,13 @@ class ExpenseManagerApp:
             if not desc:
                 messagebox.showerror("Validation", "Description is required."); return
             try:
-                amount = float(amt_str)
+                amount = to_cents(amt_str)
             except ValueError:
                 messagebox.showerror("Validation", "Amount must be numeric."); return
             if amount <= 0:
                 messagebox.showerror("Validation", "Amount must be positive."); return
 
-            # 1) Update expense base fields
-            if not app.update_expense(expense_id, description=desc, amount=amount, paid_by=payer_id):
-                messagebox.showerror("Error", "Failed to update expense."); return
-
-            # 2) Always recalc shares
+            # always recalc shares
             shares_dict = {}
             selected = [uid for uid, v in check_vars.items() if v.get()]
             if not selected:
@@ -868,8 +1345,7 @@ class ExpenseManagerApp:
                 messagebox.showerror("Validation", "Payer must be included in the split."); return
 
             if split_mode.get() == "even":
-                even = amount / len(selected)
-                shares_dict = {uid: even for uid in selected}
+                shares_dict = dict(zip(selected, allocate_cents(amount, [1] * len(selected))))
             else:
                 tmp = {}
                 for uid in selected:
@@ -877,35 +1353,35 @@ class ExpenseManagerApp:
                     if not val:
                         messagebox.showerror("Validation", "Custom split missing values."); return
                     try:
-                        tmp[uid] = float(val)
+                        tmp[uid] = to_cents(val) if amount_type.get() == "amount" else float(val)
                     except ValueError:
                         messagebox.showerror("Validation", "Custom values must be numeric."); return
+                    if amount_type.get() == "percent" and not (math.isfinite(tmp[uid]) and tmp[uid] >= 0):
+                        messagebox.showerror("Validation", "Percentages must be numbers of 0 or more."); return
 
                 total_input = sum(tmp.values())
                 if amount_type.get() == "amount":
-                    if abs(total_input - amount) > 1e-2:
+                    if total_input != amount:
                         messagebox.showerror("Validation", "Shares must sum to total amount."); return
                     shares_dict = tmp
                 else:
                     if abs(total_input - 100) > 1e-2:
                         messagebox.showerror("Validation", "Percent split must add up to 100%."); return
-                    shares_dict = {uid: amount * pct / 100.0 for uid, pct in tmp.items()}
-
-            # reconcile with existing shares; reset paid flags based on new payer
-            existing = {s.user_id: s for s in shares}
-            for uid, amt in shares_dict.items():
-                is_paid = (uid == payer_id)
-                if uid in existing:
-                    prev = existing[uid]
-                    app.update_expense_share(prev.id, amt, is_paid)
-                else:
-                    app.insert_expense_share(expense_id, uid, amt, is_paid=is_paid)
-            for uid, s in existing.items():
-                if uid not in shares_dict:
-                    app.delete_expense_share(s.id)
+                    shares_dict = dict(zip(tmp, allocate_cents(amount, tmp.values())))
+
+            def updated(ok):
+                if not ok:
+                    messagebox.showerror("Error", "Failed to update expense."); return
+
+                messagebox.showinfo("Success", "Expense updated.")
+                self.open_dynamic_frame("selected_group", group_id=group_id)
 
-            messagebox.showinfo("Success", "Expense updated.")
-            self.open_dynamic_frame("selected_group", group_id=group_id)
+            # expense fields and the whole share set are saved in one transaction;
+            # paid flags survive unless a share's amount or the payer changed
+            self.worker.submit((str(frame), "save"),
+                               lambda: app.update_expense_with_shares(expense_id, shares_dict, description=desc,
+                                                                      amount=amount, paid_by=payer_id),
+                               callback=updated, cancel=False)
 
         tk.Button(frame, text="Save Changes", command=submit_update,
                   bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=10)
@@ -913,25 +1389,38 @@ class ExpenseManagerApp:
                   command=lambda: self.open_dynamic_frame("selected_group", group_id=group_id),
                   bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR).pack(pady=5)
 
-        return frame
-
     def build_group_balances_frame(self, group_id=None, **kwargs):
-        frame = tk.Frame(self.root, bg=BG_COLOR)
+        return self.build_async(
+            lambda: app.get_group_members(group_id),
+            lambda frame, members: self.fill_group_balances_frame(frame, group_id, members))
 
+    def fill_group_balances_frame(self, frame, group_id, members):
         # ---------- members + label map ----------
-        members = app.get_group_members(group_id)
-        member_labels = [f"{u.username} ({u.first_name} {u.last_name})" for u in members]
-        label_to_uid  = {lab: u.id for lab, u in zip(member_labels, members)}
-        uid_to_name   = {u.id: u.username for u in members}
+        label_to_uid, uid_to_name = {}, {}
 
         tk.Label(frame, text="User Balances", bg=BG_COLOR, fg=FG_COLOR,
                 font=FONT).pack(pady=10)
 
-        user_var = tk.StringVar(frame); user_var.set(member_labels[0])
-        dropdown = tk.OptionMenu(frame, user_var, *member_labels)
+        user_var = tk.StringVar(frame)
+        dropdown = tk.OptionMenu(frame, user_var, "")
         dropdown.config(bg=BG_COLOR, fg=FG_COLOR, font=FONT, activebackground=OH_COLOR, highlightthickness=0)
         dropdown.pack()
 
+        def show_members(members):
+            member_labels = [f"{u.username} ({u.first_name} {u.last_name})" for u in members]
+            label_to_uid.clear(); label_to_uid.update(zip(member_labels, (u.id for u in members)))
+            uid_to_name.clear(); uid_to_name.update((u.id, u.username) for u in members)
+            menu = dropdown["menu"]
+            menu.delete(0, "end")
+            for label in member_labels:
+                menu.add_command(label=label, command=tk._setit(user_var, label))
+            if user_var.get() not in label_to_uid and member_labels:
+                user_var.set(member_labels[0])  # the shown user left the group
+                return True
+            return False
+
+        show_members(members)
+
         totals_lbl = tk.Label(frame, bg=BG_COLOR, fg=FG_COLOR, font=FONT)
         totals_lbl.pack(pady=5)
 
@@ -941,50 +1430,66 @@ class ExpenseManagerApp:
 
         row_map = []
 
-        def refresh(*_):
+        def load_balances(*_):
+            if user_var.get() not in label_to_uid:
+                return
             uid = label_to_uid[user_var.get()]
+            name = user_var.get().split()[0]
+
+            def fetch():
+                # cached by app until the database changes, so dropdown changes are cheap
+                matrix = app.get_group_balance_matrix(group_id)
+                owed_to_user = app.get_user_is_owed_by(group_id, uid, matrix=matrix)   # others → user
+                user_owes    = app.get_user_debts(group_id, uid, matrix=matrix) or []  # user → others
+
+                # merge both lists into a dict keyed by other‑user ID
+                combined = {}
+                for d in user_owes:
+                    combined.setdefault(d["user_id"], {"username": d["username"], "owes": 0, "owed": 0})
+                    combined[d["user_id"]]["owes"] = d["amount"]
+                for d in owed_to_user:
+                    combined.setdefault(d["user_id"], {"username": d["username"], "owes": 0, "owed": 0})
+                    combined[d["user_id"]]["owed"] = d["amount"]
+                return owed_to_user, user_owes, combined
+
+            def fill(result):
+                owed_to_user, user_owes, combined = result
+                total_owed_to_user = sum(d["amount"] for d in owed_to_user)
+                total_user_owes    = sum(d["amount"] for d in user_owes)
+                net_balance        = total_owed_to_user - total_user_owes
+
+                # --- totals line ---
+                totals_lbl.config(
+                    text=f"Owed to {name}: {format_cents(total_owed_to_user)}€   "
+                        f"Owes others: {format_cents(total_user_owes)}€   "
+                        f"Balance: {'+' if net_balance >= 0 else ''}{format_cents(net_balance)}€"
+                )
 
-            owed_to_user = app.get_user_is_owed_by(group_id, uid)   # others → user
-            user_owes    = app.get_user_debts(group_id, uid)        # user → others
-
-            total_owed_to_user = sum(d["amount"] for d in owed_to_user)
-            total_user_owes    = sum(d["amount"] for d in user_owes)
-            net_balance        = total_owed_to_user - total_user_owes
-
-            # --- totals line ---
-            totals_lbl.config(
-                text=f"Owed to {user_var.get().split()[0]}: {total_owed_to_user:.2f}€   "
-                    f"Owes others: {total_user_owes:.2f}€   "
-                    f"Balance: {net_balance:+.2f}€"
-            )
-
-            # --- per‑user breakdown ---
-            # merge both lists into a dict keyed by other‑user ID
-            combined = {}
-            for d in user_owes:
-                combined.setdefault(d["user_id"], {"username": d["username"], "owes": 0, "owed": 0})
-                combined[d["user_id"]]["owes"] = d["amount"]
-            for d in owed_to_user:
-                combined.setdefault(d["user_id"], {"username": d["username"], "owes": 0, "owed": 0})
-                combined[d["user_id"]]["owed"] = d["amount"]
-
-            listbox.delete(0, tk.END)
-            row_map.clear()
-
-            for other_id, info in sorted(combined.items(), key=lambda kv: kv[1]["username"].lower()):
-                diff = info["owed"] - info["owes"]
-                if diff > 0:
-                    msg = f"They owe {diff:.2f}€"
-                elif diff < 0:
-                    msg = f"You owe {abs(diff):.2f}€"
-                else:
-                    msg = "Settled"
-
-                listbox.insert(tk.END, f"   {info['username']:<15} {msg}")
-                row_map.append({"other_id": other_id, "diff": diff})
+                # --- per‑user breakdown ---
+                lines = []
+                row_map.clear()
+                for other_id, info in sorted(combined.items(), key=lambda kv: kv[1]["username"].lower()):
+                    diff = info["owed"] - info["owes"]
+                    if diff > 0:
+                        msg = f"They owe {format_cents(diff)}€"
+                    elif diff < 0:
+                        msg = f"You owe {format_cents(abs(diff))}€"
+                    else:
+                        msg = "Settled"
+
+                    lines.append(f"   {info['username']:<15} {msg}")
+                    row_map.append({"other_id": other_id, "diff": diff})
+                self.patch_listbox(listbox, lines)
+
+            # a newer load (another user picked) supersedes this one on the worker;
+            # reloads keep showing the old rows and patch only the ones that changed
+            if not row_map:
+                totals_lbl.config(text="Loading…")
+                self.show_loading(listbox)
+            self.worker.submit((str(frame), "balances"), fetch, callback=fill, widget=listbox)
 
         def on_settle_selected():
-            if not listbox.curselection():
+            if not listbox.curselection() or int(listbox.curselection()[0]) >= len(row_map):
                 messagebox.showerror("No selection", "Pick a person in the list first.")
                 return
 
@@ -992,7 +1497,7 @@ class ExpenseManagerApp:
             pair = row_map[idx]
             uid  = label_to_uid[user_var.get()]
 
-            if abs(pair["diff"]) < 1e-9:
+            if pair["diff"] == 0:
                 messagebox.showinfo("Already settled", "There is nothing to settle with this person.")
                 return
 
@@ -1003,20 +1508,36 @@ class ExpenseManagerApp:
             if not messagebox.askyesno(
                 "Confirm settlement",
                 f"This will mark all unpaid shares between {uid_to_name[uid]} and {other_name} as PAID.\n"
-                f"Net being settled now: {amount:.2f}€\n\nProceed?"
+                f"Net being settled now: {format_cents(amount)}€\n\nProceed?"
             ):
                 return
 
-            changed = app.settle_user_pair(group_id, debtor_id, creditor_id)
-            if not changed:
-                messagebox.showerror("Not settled", "Could not settle; nothing changed or an error occurred.")
-            else:
-                messagebox.showinfo("Settled", f"Marked {changed} share(s) as paid.")
-                refresh()
+            def settled(changed):
+                if changed is False:
+                    messagebox.showerror("Not settled", "Could not settle; an error occurred.")
+                else:
+                    messagebox.showinfo("Settled", f"Recorded the payment and marked {changed} share(s) as paid.")
+
+            self.worker.submit((str(frame), "settle"), app.settle_user_pair,
+                               (group_id, debtor_id, creditor_id), callback=settled, cancel=False)
+
+        # Applies the changes noted for this group while the frame was hidden
+        def refresh(changes):
+            def update_members(members):
+                if not show_members(members):
+                    load_balances()
+
+            if "members" in changes:
+                self.worker.submit((str(frame), "members"), app.get_group_members, (group_id,),
+                                   callback=update_members, widget=frame)
+            elif "balances" in changes:
+                load_balances()
 
-        # refresh when user changes
-        user_var.trace_add("write", refresh)
-        refresh()
+        frame.refresh = refresh
+
+        # reload when user changes
+        user_var.trace_add("write", load_balances)
+        load_balances()
 
         # Action row
         btn_row = tk.Frame(frame, bg=BG_COLOR); btn_row.pack(pady=8)
@@ -1029,8 +1550,6 @@ class ExpenseManagerApp:
         # nice shortcut: double-click a row to settle
         listbox.bind("<Double-Button-1>", lambda _e: on_settle_selected())
 
-        return frame
-
 # Start app
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,7 +1,48 @@
 # models.py
 import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from fractions import Fraction
+
+# Money is stored as integer minor units (cents) everywhere below the GUI.
+def to_cents(value):
+    """Convert a major-unit amount (e.g. "12.34", 12.34) to integer cents"""
+    try:
+        cents = (Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+        return int(cents)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Not a valid amount: {value!r}") from None
+
+def format_cents(cents):
+    """Format integer cents as a major-unit string, e.g. 1234 -> '12.34'"""
+    sign = "-" if cents < 0 else ""
+    major, minor = divmod(abs(int(cents)), 100)
+    return f"{sign}{major}.{minor:02d}"
+
+def allocate_cents(total, weights):
+    """Split integer `total` in proportion to `weights` with no rounding drift.
+
+    Largest-remainder method: every part gets the floor of its exact quota and
+    the leftover cents go to the largest fractional remainders (earlier
+    entries win ties), so the parts always sum to exactly `total`.
+    """
+    weights = [Fraction(w) for w in weights]
+    if any(w < 0 for w in weights):
+        raise ValueError("weights must be non-negative.")
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        raise ValueError("weights must not all be zero.")
+
+    quotas = [total * w / weight_sum for w in weights]
+    parts = [q.numerator // q.denominator for q in quotas]
+    leftover = total - sum(parts)
+    by_remainder = sorted(range(len(quotas)), key=lambda i: (-(quotas[i] - parts[i]), i))
+    for i in by_remainder[:leftover]:
+        parts[i] += 1
+    return parts
 
 class User:
+    __slots__ = ('id', 'username', 'first_name', 'last_name', 'email', 'created_at')
+
     def __init__(self, id=None, username=None, first_name=None, last_name=None, email=None, created_at=None):
         self.id = id  # Primary key
         self.username = username
@@ -14,6 +55,8 @@ class User:
         return f"User(id={self.id}, username='{self.username}', name='{self.first_name} {self.last_name}')"
 
 class ExpenseGroup:
+    __slots__ = ('id', 'name', 'description', 'created_by', 'created_at')
+
     def __init__(self, id=None, name=None, description=None, created_by=None, created_at=None):
         self.id = id  # Primary key
         self.name = name
@@ -25,10 +68,12 @@ class ExpenseGroup:
         return f"ExpenseGroup(id={self.id}, name='{self.name}')"
 
 class Expense:
+    __slots__ = ('id', 'description', 'amount', 'date', 'paid_by', 'group_id', 'created_at')
+
     def __init__(self, id=None, description=None, amount=None, date=None, paid_by=None, group_id=None, created_at=None):
         self.id = id  # Primary key
         self.description = description
-        self.amount = amount  # Total amount of the expense
+        self.amount = amount  # Total amount of the expense, in cents
         self.date = date if date else datetime.datetime.now().date()
         self.paid_by = paid_by  # User ID who paid
         self.group_id = group_id  # ExpenseGroup ID
@@ -38,11 +83,13 @@ class Expense:
         return f"Expense(id={self.id}, description='{self.description}', amount={self.amount})"
 
 class ExpenseShare:
+    __slots__ = ('id', 'expense_id', 'user_id', 'amount', 'is_paid', 'created_at')
+
     def __init__(self, id=None, expense_id=None, user_id=None, amount=None, is_paid=False, created_at=None):
         self.id = id  # Primary key
         self.expense_id = expense_id
         self.user_id = user_id
-        self.amount = amount  # Amount this user owes for this expense
+        self.amount = amount  # Amount this user owes for this expense, in cents
         self.is_paid = is_paid  # Whether this share has been paid
         self.created_at = created_at if created_at else datetime.datetime.now()
     
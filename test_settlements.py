@@ -0,0 +1,81 @@
+import datetime
+import unittest
+
+import database as db
+from models import User, ExpenseGroup, Expense, ExpenseShare
+
+
+class MarkShareAsPaidTest(unittest.TestCase):
+    """Marking a share paid must only record what its pair still owes"""
+
+    def setUp(self):
+        self.conn = db.connect_db(":memory:")
+        db.create_tables(self.conn)
+        db.migrate_db(self.conn)
+        self.a = db.insert_user(self.conn, User(username="a", first_name="A", last_name="A"))
+        self.b = db.insert_user(self.conn, User(username="b", first_name="B", last_name="B"))
+        self.group = db.insert_expense_group(self.conn, ExpenseGroup(name="Trip", created_by=self.a))
+        db.add_group_member(self.conn, self.group, self.a)
+        db.add_group_member(self.conn, self.group, self.b)
+        # a pays 1000, b owes a 500
+        self.expense = db.insert_expense(self.conn, Expense(
+            description="Dinner", amount=1000, date=datetime.date(2026, 1, 1),
+            paid_by=self.a, group_id=self.group))
+        db.insert_expense_shares_bulk(self.conn, [
+            ExpenseShare(expense_id=self.expense, user_id=self.a, amount=500, is_paid=True),
+            ExpenseShare(expense_id=self.expense, user_id=self.b, amount=500),
+        ])
+        self.share = self.b_share()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def b_share(self):
+        return next(s for s in db.get_expense_shares(self.conn, self.expense) if s.user_id == self.b)
+
+    def debts(self):
+        return db.get_group_balance_matrix(self.conn, self.group)["debts"]
+
+    def test_partial_payment_then_mark_paid(self):
+        db.record_settlements(self.conn, self.group, [(self.b, self.a, 300)])
+        self.assertEqual(self.debts(), {self.b: {self.a: 200}})
+
+        db.mark_share_as_paid(self.conn, self.share.id)
+        self.assertEqual(self.debts(), {})
+
+    def test_settle_edit_then_mark_paid(self):
+        db.settle_user_pair(self.conn, self.group, self.b, self.a)
+        self.assertEqual(self.debts(), {})
+
+        # the expense grows to 1200; b's changed share is unpaid again
+        expense = db.get_expense(self.conn, self.expense)
+        expense.amount = 1200
+        db.update_expense(self.conn, expense)
+        db.replace_expense_shares(self.conn, self.expense, {self.a: (600, True), self.b: (600, False)})
+        self.assertEqual(self.debts(), {self.b: {self.a: 100}})
+
+        db.mark_share_as_paid(self.conn, self.share.id)
+        self.assertEqual(self.debts(), {})
+
+    def test_update_share_as_paid_settles(self):
+        share = self.b_share()
+        share.is_paid = True
+        db.update_expense_share(self.conn, share)
+        self.assertEqual(self.debts(), {})
+
+    def test_insert_paid_share_settles(self):
+        b_share = self.b_share()
+        db.delete_expense_share(self.conn, b_share.id)
+        db.insert_expense_share(self.conn, ExpenseShare(
+            expense_id=self.expense, user_id=self.b, amount=500, is_paid=True))
+        self.assertEqual(self.debts(), {})
+        self.assertTrue(self.b_share().is_paid)
+
+    def test_unmark_never_reverses_the_debt(self):
+        db.mark_share_as_paid(self.conn, self.share.id)
+        db.mark_share_as_paid(self.conn, self.share.id, False)
+        self.assertEqual(self.debts(), {self.b: {self.a: 500}})
+
+
+if __name__ == "__main__":
+    unittest.main()